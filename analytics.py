@@ -0,0 +1,131 @@
+import threading
+
+import numpy as np
+
+QUESTION_COUNT = 10
+CHUNK_SIZE = 50000
+
+# The caller passes the groups to break the answers down by, e.g.
+# {'age_range': ['13-18', ...], 'gender': ['Male', 'Female'], 'language': ['en', 'sw']}.
+# Ages are counted under the 'low-high' range they fall in and the gender
+# column holds an index into its list.
+
+# Answers never change once stored, so the sums below only ever grow. Each
+# refresh reads the rows added since the last one (in chunks) and folds them
+# in, instead of recomputing over the whole table.
+_lock = threading.Lock()
+_state = {}
+
+
+def empty_state(groups):
+    return {
+        'last_id': 0,
+        'total': 0,
+        'yes': np.zeros(QUESTION_COUNT, dtype=np.int64),
+        'cooccurrence': np.zeros((QUESTION_COUNT, QUESTION_COUNT), dtype=np.int64),
+        'groups': {
+            name: {
+                'count': np.zeros(len(labels), dtype=np.int64),
+                'yes': np.zeros((len(labels), QUESTION_COUNT), dtype=np.int64),
+            }
+            for name, labels in groups.items()
+        },
+    }
+
+
+def answer_matrix(answers):
+    return ((answers[:, None] >> np.arange(QUESTION_COUNT)) & 1).astype(np.int64)
+
+
+def age_bounds(age_ranges):
+    return np.array([[int(bound) for bound in label.split('-')] for label in age_ranges], dtype=np.float64)
+
+
+def add_chunk(state, groups, rows):
+    ids, ages, genders, languages, answers = zip(*rows)
+    matrix = answer_matrix(np.array(answers, dtype=np.int64))
+
+    state['total'] += len(matrix)
+    state['yes'] += matrix.sum(axis=0)
+    state['cooccurrence'] += matrix.T @ matrix
+
+    ages = np.array(ages, dtype=np.float64)[:, None]
+    bounds = age_bounds(groups['age_range'])
+    codes = {
+        'age_range': (ages >= bounds[:, 0]) & (ages <= bounds[:, 1]),
+        'gender': np.array(genders, dtype=np.int64)[:, None] == np.arange(len(groups['gender'])),
+        'language': np.array(languages, dtype=object)[:, None] == np.array(groups['language'], dtype=object),
+    }
+    for name, one_hot in codes.items():
+        one_hot = one_hot.astype(np.int64)
+        state['groups'][name]['count'] += one_hot.sum(axis=0)
+        state['groups'][name]['yes'] += one_hot.T @ matrix
+
+    state['last_id'] = ids[-1]
+
+
+def refresh(conn, question_set, groups, chunk_size=CHUNK_SIZE):
+    state = _state.get(question_set)
+    if state is None:
+        state = _state[question_set] = empty_state(groups)
+    while True:
+        rows = conn.execute('''
+            SELECT id, age, COALESCE(gender, -1), language, answers
+            FROM assessments
+            WHERE id > ? AND question_set = ? AND answers IS NOT NULL
+            ORDER BY id
+            LIMIT ?
+        ''', (state['last_id'], question_set, chunk_size)).fetchall()
+        if not rows:
+            break
+        add_chunk(state, groups, rows)
+    return state
+
+
+def percentages(yes, count):
+    count = np.asarray(count, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        shares = np.where(count > 0, yes / count * 100, 0.0)
+    return np.round(shares, 1).tolist()
+
+
+def summarize(state, groups):
+    total = state['total']
+    return {
+        'total': total,
+        'prevalence': percentages(state['yes'], total),
+        'groups': {
+            name: {
+                label: {
+                    'count': int(group['count'][i]),
+                    'prevalence': percentages(group['yes'][i], group['count'][i]),
+                }
+                for i, label in enumerate(groups[name])
+            }
+            for name, group in state['groups'].items()
+        },
+        'cooccurrence': state['cooccurrence'].tolist(),
+        'cooccurrence_share': percentages(state['cooccurrence'], total),
+    }
+
+
+def question_summary(conn, question_set, groups):
+    with _lock:
+        return summarize(refresh(conn, question_set, groups), groups)
+
+
+# A filtered slice is summed from scratch on every call; only the unfiltered
+# totals are kept between requests.
+def slice_summary(conn, question_set, groups, where, params=(), chunk_size=CHUNK_SIZE):
+    state = empty_state(groups)
+    cursor = conn.execute(f'''
+        SELECT id, age, COALESCE(gender, -1), language, answers
+        FROM assessments
+        WHERE question_set = ? AND answers IS NOT NULL AND {where}
+    ''', (question_set, *params))
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        add_chunk(state, groups, rows)
+    return summarize(state, groups)
@@ -1,17 +1,276 @@
-from flask import Flask, request, render_template_string, url_for, send_from_directory, redirect, session, send_file
+from flask import Flask, request, render_template, url_for, redirect, session, send_file, jsonify, abort, g, got_request_exception
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.security import safe_join
 import os
 import sqlite3
-from datetime import datetime
-import pandas as pd
+from datetime import datetime, date, timedelta
 import io
+import csv
+import tempfile
+import threading
+import queue
+import time
+from concurrent.futures import Future
+from contextlib import closing
 import json
+import gzip
+import hashlib
+import hmac
+import mimetypes
+from urllib.parse import quote
+import click
+import fcntl
 
-app = Flask(__name__)
+import metrics
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+app = Flask(__name__, static_folder=None)
 app.secret_key = 'your_secret_key'
+app.config.update(
+    DATABASE='gbv_assessments.db',
+    SQLITE_PRAGMAS={
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,
+        'cache_size': -16000,
+        'mmap_size': 268435456,
+    },
+    # Write-behind mode: submissions are queued and a background thread
+    # commits them in batches of up to WRITE_BATCH_SIZE rows, waiting at most
+    # WRITE_BATCH_DELAY seconds for a batch to fill. Batches only form when
+    # requests in one process run concurrently, e.g. gthread workers.
+    WRITE_BEHIND=False,
+    WRITE_BATCH_SIZE=100,
+    WRITE_BATCH_DELAY=0.02,
+    WRITE_TIMEOUT=10,
+    # Bearer tokens accepted by /api/assessments/ingest, e.g.
+    # GBV_INGEST_TOKENS='["token-for-team-a", "token-for-team-b"]'.
+    INGEST_TOKENS=[],
+    INGEST_MAX_RECORDS=5000,
+    INGEST_MAX_BYTES=4 * 1024 * 1024,
+    # Where /download_csv keeps the export between requests; defaults to
+    # <DATABASE>.exports next to the database.
+    EXPORT_DIR=None,
+    # Admin pages and exports read a copy of the database that is replaced
+    # once it is SNAPSHOT_MAX_AGE seconds old or SNAPSHOT_MAX_ROWS assessments
+    # behind. SNAPSHOT_DATABASE defaults to <DATABASE>.snapshot.db.
+    SNAPSHOT_DATABASE=None,
+    SNAPSHOT_MAX_AGE=300,
+    SNAPSHOT_MAX_ROWS=1000,
+)
+# e.g. GBV_DATABASE=/data/gbv.db or GBV_SQLITE_PRAGMAS__busy_timeout=10000
+app.config.from_prefixed_env('GBV')
+
+# Each thread (and each forked worker) keeps one open connection configured
+# with SQLITE_PRAGMAS instead of connecting on every request. In WAL mode the
+# dashboard and exports read without blocking assessment writes.
+_db_local = threading.local()
+
+def connect_db(path=None, factory=metrics.TimedConnection):
+    conn = sqlite3.connect(path or app.config['DATABASE'], factory=factory)
+    for name, value in app.config['SQLITE_PRAGMAS'].items():
+        conn.execute(f'PRAGMA {name} = {value}')
+    return conn
+
+def get_db():
+    conn = getattr(_db_local, 'conn', None)
+    if conn is None or _db_local.pid != os.getpid():
+        conn = connect_db()
+        _db_local.conn = conn
+        _db_local.pid = os.getpid()
+    return conn
+
+# The snapshot is written with SQLite's backup API from a read transaction,
+# so taking it never blocks submissions, then renamed into place. Readers open
+# it read-only and immutable (no locking at all); a connection keeps reading
+# the copy it opened until it notices a newer one. A stale copy is replaced by
+# a background thread while requests go on reading the old one. The first
+# copy is taken by the request that finds none, so the admin pages never read
+# the live database.
+def snapshot_path():
+    return app.config['SNAPSHOT_DATABASE'] or os.path.splitext(app.config['DATABASE'])[0] + '.snapshot.db'
+
+def take_snapshot(path):
+    tmp_path = path + '.tmp'
+    # Left behind if a worker died while taking the last one.
+    for leftover in (tmp_path, tmp_path + '-journal'):
+        if os.path.exists(leftover):
+            os.remove(leftover)
+    try:
+        with closing(sqlite3.connect(tmp_path)) as target:
+            with closing(connect_db()) as source:
+                source.backup(target)
+            target.execute('PRAGMA journal_mode = DELETE')
+            if os.path.exists(path):
+                carry_trends(target, path)
+            refresh_trends(target)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
+
+# Trend rollups are brought up to date in the copy, not in the live database,
+# so no write lock is taken there. The live rollups only move on when `flask
+# refresh-trends` runs, so when the previous snapshot is further ahead its
+# rollups are carried over and only newer rows and support answers changed
+# since it was taken are folded in.
+def carry_trends(target, path):
+    watermark_sql = "SELECT COALESCE(MAX(last_id), 0) FROM rollup_watermarks WHERE name = 'trends'"
+    version_sql = 'SELECT COALESCE(MAX(version), 0) FROM support_changes'
+    with closing(open_snapshot(path)) as previous:
+        watermark = previous.execute(watermark_sql).fetchone()[0]
+        version = previous.execute(version_sql).fetchone()[0]
+        # Also skip a snapshot that is ahead of the database, e.g. one taken
+        # before a backup was restored.
+        if (watermark <= target.execute(watermark_sql).fetchone()[0]
+                or watermark > target.execute('SELECT COALESCE(MAX(id), 0) FROM assessments').fetchone()[0]
+                or version > target.execute(version_sql).fetchone()[0]):
+            return
+        rollups = {table: previous.execute(f'SELECT * FROM {table}').fetchall() for table in ('daily_rollups', 'weekly_rollups')}
+    with target:
+        for table, rows in rollups.items():
+            target.execute(f'DELETE FROM {table}')
+            target.executemany(f'INSERT INTO {table} VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+        target.execute('DELETE FROM rollup_dirty_days')
+        target.execute('''
+            INSERT INTO rollup_dirty_days (day)
+            SELECT DISTINCT date(timestamp) FROM assessments
+            WHERE id IN (SELECT assessment_id FROM support_changes WHERE version > ?)
+              AND id <= ? AND timestamp IS NOT NULL
+        ''', (version, watermark))
+        target.execute(
+            "INSERT INTO rollup_watermarks (name, last_id) VALUES ('trends', ?) "
+            "ON CONFLICT (name) DO UPDATE SET last_id = excluded.last_id",
+            (watermark,)
+        )
+
+# Returns whether a newer snapshot than the one last seen is now in place.
+# With wait=True a copy being taken by another worker is waited for instead.
+def refresh_snapshot(path, seen=None, force=False, wait=False):
+    with open(path + '.lock', 'a') as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            # Another worker is taking one; keep reading the current copy.
+            if not (force or wait):
+                return False
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        modified = os.stat(path).st_mtime if os.path.exists(path) else None
+        if force or modified == seen:
+            take_snapshot(path)
+        return True
+
+_snapshot_thread = None
+_snapshot_thread_lock = threading.Lock()
+
+def refresh_snapshot_later(path, seen):
+    global _snapshot_thread
+    with _snapshot_thread_lock:
+        if _snapshot_thread is None or not _snapshot_thread.is_alive():
+            _snapshot_thread = threading.Thread(
+                target=run_snapshot_refresh, args=(path, seen), name='snapshot-refresh', daemon=True
+            )
+            _snapshot_thread.start()
+
+def run_snapshot_refresh(path, seen):
+    try:
+        refresh_snapshot(path, seen)
+    except (OSError, sqlite3.Error) as e:
+        app.logger.error("Snapshot refresh failed: %s", e)
+
+SNAPSHOT_PRAGMAS = {'cache_size': -16000, 'mmap_size': 268435456}
+
+def open_snapshot(path):
+    uri = f"file:{quote(os.path.abspath(path))}?mode=ro&immutable=1"
+    conn = sqlite3.connect(uri, uri=True, factory=metrics.TimedConnection)
+    for name, default in SNAPSHOT_PRAGMAS.items():
+        conn.execute(f"PRAGMA {name} = {app.config['SQLITE_PRAGMAS'].get(name, default)}")
+    return conn
+
+def snapshot_stale(conn, modified):
+    if time.time() - modified >= app.config['SNAPSHOT_MAX_AGE']:
+        return True
+    query = 'SELECT COALESCE(MAX(id), 0) FROM assessments'
+    behind = get_db().execute(query).fetchone()[0] - conn.execute(query).fetchone()[0]
+    return behind >= app.config['SNAPSHOT_MAX_ROWS']
+
+def get_snapshot_db():
+    path = snapshot_path()
+    if not os.path.exists(path):
+        refresh_snapshot(path, wait=True)
+    stat = os.stat(path)
+    key = (os.getpid(), stat.st_ino, stat.st_mtime)
+    if getattr(_db_local, 'snapshot_key', None) != key:
+        _db_local.snapshot = open_snapshot(path)
+        _db_local.snapshot_key = key
+    _db_local.snapshot_time = datetime.fromtimestamp(stat.st_mtime)
+    if snapshot_stale(_db_local.snapshot, stat.st_mtime):
+        refresh_snapshot_later(path, stat.st_mtime)
+    return _db_local.snapshot
+
+def snapshot_time():
+    return _db_local.snapshot_time
+
+AGE_RANGES = ['13-18', '19-25', '26-35']
+
+# gender, level and support are stored as small integer codes and only turned
+# into (localized) labels when a page or export is rendered. gender is an
+# index into GENDERS, level is 1 for a risk result and 0 otherwise, support is
+# an index into SUPPORT_ANSWERS; NULL means not given.
+GENDERS = ['Male', 'Female']
+LEVEL_LABELS = {
+    'en': ['No Risk', 'GBV Risk'],
+    'sw': ['Hakuna Hatari', 'Hatari ya GBV'],
+}
+SUPPORT_ANSWERS = ['no', 'yes']
+
+def code_of(values, value):
+    return values.index(value) if value in values else None
+
+def label_of(values, code):
+    return values[code] if code is not None else None
+
+def level_label(level, language):
+    return LEVEL_LABELS.get(language, LEVEL_LABELS['en'])[level]
+
+def age_range_sql(age):
+    return f'''CASE
+        WHEN {age} BETWEEN 13 AND 18 THEN '13-18'
+        WHEN {age} BETWEEN 19 AND 25 THEN '19-25'
+        WHEN {age} BETWEEN 26 AND 35 THEN '26-35'
+        ELSE 'other'
+    END'''
+
+# assessment_stats holds one counter per (age_range, gender, language, risk,
+# support) combination. Triggers keep it in step with assessments inside the
+# same transaction as the INSERT/UPDATE, so the dashboard reads a handful of
+# rows instead of the whole table. Missing genders and support answers are
+# counted under -1.
+STATS_COLUMNS = 'age_range, gender, language, risk, support'
+
+def stats_key_sql(row=''):
+    prefix = f'{row}.' if row else ''
+    return [
+        age_range_sql(f'{prefix}age'),
+        f"COALESCE({prefix}gender, -1)",
+        f"COALESCE({prefix}language, '')",
+        f"COALESCE({prefix}level, 0)",
+        f"COALESCE({prefix}support, -1)",
+    ]
+
+def stats_match_sql(row):
+    return ' AND '.join(
+        f'{column} = ({expression})'
+        for column, expression in zip(STATS_COLUMNS.split(', '), stats_key_sql(row))
+    )
 
 def init_db():
-    db_path = 'gbv_assessments.db'
-    with sqlite3.connect(db_path) as conn:
+    with closing(connect_db()) as conn, conn:
         cursor = conn.cursor()
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS assessments (
@@ -28,8 +287,1044 @@ def init_db():
             )
         ''')
         conn.commit()
+        migrate_db(conn)
+
+def compute_stats(conn):
+    cursor = conn.execute(f'''
+        SELECT {', '.join(stats_key_sql())}, COUNT(*)
+        FROM assessments
+        GROUP BY 1, 2, 3, 4, 5
+    ''')
+    return {tuple(row[:5]): row[5] for row in cursor}
+
+def rebuild_stats(conn, check_only=False):
+    expected = compute_stats(conn)
+    current = {
+        tuple(row[:5]): row[5]
+        for row in conn.execute(f'SELECT {STATS_COLUMNS}, count FROM assessment_stats WHERE count != 0')
+    }
+    drift = {
+        key: (current.get(key, 0), expected.get(key, 0))
+        for key in set(expected) | set(current)
+        if current.get(key, 0) != expected.get(key, 0)
+    }
+    if drift and not check_only:
+        conn.execute('DELETE FROM assessment_stats')
+        conn.executemany(
+            f'INSERT INTO assessment_stats ({STATS_COLUMNS}, count) VALUES (?, ?, ?, ?, ?, ?)',
+            [key + (count,) for key, count in expected.items()]
+        )
+    return drift
+
+# Questionnaire answers are stored as a bitmask: bit i is set when question i
+# (0-based) was answered "yes". question_set records which version of
+# QUESTIONS the bits refer to.
+QUESTION_COUNT = 10
+QUESTION_SET_VERSION = 1
+
+def encode_answers(responses):
+    return sum(1 << i for i, response in enumerate(responses) if response == 'yes')
+
+def decode_answers(answers, count=QUESTION_COUNT):
+    if answers is None:
+        return []
+    return ['yes' if answers >> i & 1 else 'no' for i in range(count)]
+
+def migrate_answers_bitmask(conn):
+    conn.execute('ALTER TABLE assessments ADD COLUMN answers INTEGER')
+    conn.execute('ALTER TABLE assessments ADD COLUMN question_set INTEGER')
+    conn.execute(f'''
+        UPDATE assessments SET
+            question_set = {QUESTION_SET_VERSION},
+            answers = (
+                SELECT COALESCE(SUM(1 << CAST(key AS INTEGER)), 0)
+                FROM json_each(assessments.responses)
+                WHERE value = 'yes'
+            )
+        WHERE json_valid(responses)
+    ''')
+    conn.execute('ALTER TABLE assessments DROP COLUMN responses')
+
+def migrate_trend_rollups(conn):
+    for table, period in (('daily_rollups', 'day'), ('weekly_rollups', 'week')):
+        conn.execute(f'''
+            CREATE TABLE {table} (
+                {period} TEXT NOT NULL,
+                language TEXT NOT NULL,
+                age_range TEXT NOT NULL,
+                gender TEXT NOT NULL,
+                assessments INTEGER NOT NULL,
+                risk INTEGER NOT NULL,
+                support_yes INTEGER NOT NULL,
+                support_answered INTEGER NOT NULL,
+                PRIMARY KEY ({period}, language, age_range, gender)
+            )
+        ''')
+    conn.execute('CREATE TABLE rollup_watermarks (name TEXT PRIMARY KEY, last_id INTEGER NOT NULL)')
+    conn.execute('CREATE TABLE rollup_dirty_days (day TEXT PRIMARY KEY)')
+    conn.execute('CREATE INDEX idx_assessments_timestamp ON assessments (timestamp)')
+    create_rollup_trigger(conn)
+
+# A support answer usually arrives after its row has been rolled up; the day
+# is queued so the next refresh recomputes it.
+def create_rollup_trigger(conn):
+    conn.execute('''
+        CREATE TRIGGER rollup_support_changed AFTER UPDATE OF support ON assessments
+        WHEN OLD.id <= COALESCE((SELECT last_id FROM rollup_watermarks WHERE name = 'trends'), 0)
+        BEGIN
+            INSERT OR IGNORE INTO rollup_dirty_days (day) VALUES (date(NEW.timestamp));
+        END
+    ''')
+
+# Offline submissions are keyed by an id generated on the device, so a batch
+# that is sent again after a lost response is not stored twice.
+def migrate_synced_submissions(conn):
+    conn.execute('''
+        CREATE TABLE synced_submissions (
+            client_id TEXT PRIMARY KEY,
+            assessment_id INTEGER NOT NULL
+        )
+    ''')
+
+def create_stats_triggers(conn):
+    conn.execute(f'''
+        CREATE TRIGGER assessment_stats_insert AFTER INSERT ON assessments
+        BEGIN
+            INSERT INTO assessment_stats ({STATS_COLUMNS}, count)
+            VALUES ({', '.join(stats_key_sql('NEW'))}, 1)
+            ON CONFLICT ({STATS_COLUMNS}) DO UPDATE SET count = count + 1;
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER assessment_stats_update
+        AFTER UPDATE OF age, gender, language, level, support ON assessments
+        BEGIN
+            UPDATE assessment_stats SET count = count - 1 WHERE {stats_match_sql('OLD')};
+            INSERT INTO assessment_stats ({STATS_COLUMNS}, count)
+            VALUES ({', '.join(stats_key_sql('NEW'))}, 1)
+            ON CONFLICT ({STATS_COLUMNS}) DO UPDATE SET count = count + 1;
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER assessment_stats_delete AFTER DELETE ON assessments
+        BEGIN
+            UPDATE assessment_stats SET count = count - 1 WHERE {stats_match_sql('OLD')};
+        END
+    ''')
+
+# SQLite cannot change a column's type in place, so the table is copied into
+# one with INTEGER gender, level and support columns. The covering indexes
+# hold every column the dashboard counts and filters on, so those queries are
+# answered from the index without touching the table. Statistics and rollups
+# are keyed on the old strings and are rebuilt from the converted rows.
+def migrate_coded_columns(conn):
+    sequence = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'assessments'").fetchone()
+    conn.execute('''
+        CREATE TABLE assessments_coded (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            age INTEGER,
+            gender INTEGER,
+            language TEXT,
+            answers INTEGER,
+            question_set INTEGER,
+            yes_count INTEGER,
+            no_count INTEGER,
+            level INTEGER,
+            support INTEGER,
+            timestamp DATETIME
+        )
+    ''')
+    conn.execute('''
+        INSERT INTO assessments_coded
+        SELECT id, age,
+               CASE lower(trim(gender)) WHEN 'male' THEN 0 WHEN 'female' THEN 1 END,
+               language, answers, question_set, yes_count, no_count,
+               CASE
+                   WHEN level IN ('GBV Risk', 'Hatari ya GBV') THEN 1
+                   WHEN level IN ('No Risk', 'Hakuna Hatari') THEN 0
+                   ELSE yes_count > 0
+               END,
+               CASE lower(trim(support)) WHEN 'no' THEN 0 WHEN 'yes' THEN 1 END,
+               timestamp
+        FROM assessments
+    ''')
+    conn.execute('DROP TABLE assessments')
+    conn.execute('ALTER TABLE assessments_coded RENAME TO assessments')
+    if sequence:
+        conn.execute("DELETE FROM sqlite_sequence WHERE name = 'assessments'")
+        conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('assessments', ?)", sequence)
+
+    conn.execute('CREATE INDEX idx_assessments_timestamp ON assessments (timestamp, language, age, gender, level, support)')
+    conn.execute('CREATE INDEX idx_assessments_level ON assessments (level, gender, support, language, age)')
+    conn.execute('CREATE INDEX idx_assessments_gender_age ON assessments (gender, age, level, support, language)')
+
+    conn.execute('DROP TABLE IF EXISTS assessment_stats')
+    conn.execute('''
+        CREATE TABLE assessment_stats (
+            age_range TEXT NOT NULL,
+            gender INTEGER NOT NULL,
+            language TEXT NOT NULL,
+            risk INTEGER NOT NULL,
+            support INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (age_range, gender, language, risk, support)
+        )
+    ''')
+    create_stats_triggers(conn)
+    rebuild_stats(conn)
+
+    for table, period in (('daily_rollups', 'day'), ('weekly_rollups', 'week')):
+        conn.execute(f'DROP TABLE {table}')
+        conn.execute(f'''
+            CREATE TABLE {table} (
+                {period} TEXT NOT NULL,
+                language TEXT NOT NULL,
+                age_range TEXT NOT NULL,
+                gender INTEGER NOT NULL,
+                assessments INTEGER NOT NULL,
+                risk INTEGER NOT NULL,
+                support_yes INTEGER NOT NULL,
+                support_answered INTEGER NOT NULL,
+                PRIMARY KEY ({period}, language, age_range, gender)
+            )
+        ''')
+    conn.execute("DELETE FROM rollup_watermarks WHERE name = 'trends'")
+    conn.execute('DELETE FROM rollup_dirty_days')
+    create_rollup_trigger(conn)
+
+# Every admin filter gets an index led by its own column, so any single filter
+# is an index seek. Each index carries the other filter columns too (the
+# level and gender ones gain timestamp here), so counting a filtered slice
+# never reads the table.
+def migrate_filter_indexes(conn):
+    conn.execute('DROP INDEX idx_assessments_level')
+    conn.execute('DROP INDEX idx_assessments_gender_age')
+    conn.execute('CREATE INDEX idx_assessments_level ON assessments (level, gender, support, language, age, timestamp)')
+    conn.execute('CREATE INDEX idx_assessments_gender ON assessments (gender, age, level, support, language, timestamp)')
+    conn.execute('CREATE INDEX idx_assessments_age ON assessments (age, gender, level, support, language, timestamp)')
+    conn.execute('CREATE INDEX idx_assessments_language ON assessments (language, level, gender, support, age, timestamp)')
+    conn.execute('CREATE INDEX idx_assessments_support ON assessments (support, level, gender, language, age, timestamp)')
+
+# Every change to a support answer gets a new version number. The cached CSV
+# export records the version it reflects and rewrites itself from the first
+# changed row when the number moves on.
+def migrate_support_changes(conn):
+    conn.execute('''
+        CREATE TABLE support_changes (
+            version INTEGER PRIMARY KEY AUTOINCREMENT,
+            assessment_id INTEGER NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE TRIGGER support_changed AFTER UPDATE OF support ON assessments
+        WHEN OLD.support IS NOT NEW.support
+        BEGIN
+            INSERT INTO support_changes (assessment_id) VALUES (NEW.id);
+        END
+    ''')
+
+# Admin pages list assessments newest first. The indexes above are ordered by
+# their other filter columns, so a filtered page had to collect and sort the
+# whole slice. These ones end in the id: an equality filter (an age range is
+# matched by its bucket) walks the slice in id order and stops after a page.
+# A date range is narrowed to the ids stored on those days, which
+# assessment_days keeps up to date as rows are inserted. See
+# filter_sql(page=True).
+def migrate_page_indexes(conn):
+    for column in ('gender', 'language', 'level', 'support'):
+        conn.execute(f'CREATE INDEX idx_assessments_{column}_id ON assessments ({column}, id)')
+    conn.execute(f"CREATE INDEX idx_assessments_age_range_id ON assessments (({age_range_sql('age')}), id)")
+    conn.execute('''
+        CREATE TABLE assessment_days (
+            day TEXT PRIMARY KEY,
+            first_id INTEGER NOT NULL,
+            last_id INTEGER NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        INSERT INTO assessment_days (day, first_id, last_id)
+        SELECT date(timestamp), MIN(id), MAX(id) FROM assessments
+        WHERE date(timestamp) IS NOT NULL
+        GROUP BY date(timestamp)
+    ''')
+    conn.execute('''
+        CREATE TRIGGER assessment_days_insert AFTER INSERT ON assessments
+        WHEN date(NEW.timestamp) IS NOT NULL
+        BEGIN
+            INSERT INTO assessment_days (day, first_id, last_id)
+            VALUES (date(NEW.timestamp), NEW.id, NEW.id)
+            ON CONFLICT (day) DO UPDATE SET
+                first_id = MIN(first_id, excluded.first_id),
+                last_id = MAX(last_id, excluded.last_id);
+        END
+    ''')
+
+# The covering indexes from migrate_filter_indexes carried every filter column,
+# which doubled the size of the database and slowed every insert. The (column,
+# id) indexes above already make each filter a seek, so they go, and the
+# timestamp index keeps only the timestamp.
+def migrate_narrow_indexes(conn):
+    for column in ('level', 'gender', 'age', 'language', 'support', 'timestamp'):
+        conn.execute(f'DROP INDEX idx_assessments_{column}')
+    conn.execute('CREATE INDEX idx_assessments_timestamp ON assessments (timestamp)')
+
+# Schema changes applied in order on top of the original table; PRAGMA
+# user_version records how many have run.
+MIGRATIONS = [
+    migrate_answers_bitmask,
+    migrate_trend_rollups,
+    migrate_synced_submissions,
+    migrate_coded_columns,
+    migrate_filter_indexes,
+    migrate_support_changes,
+    migrate_page_indexes,
+    migrate_narrow_indexes,
+]
+
+def migrate_db(conn):
+    while True:
+        conn.execute('BEGIN IMMEDIATE')
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        if version >= len(MIGRATIONS):
+            conn.commit()
+            break
+        try:
+            MIGRATIONS[version](conn)
+            conn.execute(f'PRAGMA user_version = {version + 1}')
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+ASSESSMENT_COLUMNS = ['id', 'age', 'gender', 'language', 'responses', 'yes_count', 'no_count', 'level', 'support', 'timestamp']
+SELECT_COLUMNS = 'id, age, gender, language, answers, yes_count, no_count, level, support, timestamp'
+INSERT_COLUMNS = ['age', 'gender', 'language', 'answers', 'question_set', 'yes_count', 'no_count', 'level', 'support', 'timestamp']
+
+def label_row(row):
+    id, age, gender, language, answers, yes_count, no_count, level, support, timestamp = row
+    return (
+        id, age, label_of(GENDERS, gender), language, answers, yes_count, no_count,
+        level_label(level, language) if level is not None else None, label_of(SUPPORT_ANSWERS, support), timestamp
+    )
+
+def decode_row(row):
+    row = label_row(row)
+    return row[:4] + (decode_answers(row[4]),) + row[5:]
+
+ADMIN_PAGE_SIZE = 50
+ADMIN_MAX_PAGE_SIZE = 500
+
+def page_limit():
+    limit = request.args.get('limit', ADMIN_PAGE_SIZE, type=int)
+    return min(max(limit, 1), ADMIN_MAX_PAGE_SIZE)
+
+# Admin filters come from the query string; values other than the listed
+# choices are ignored. filter_sql() turns each one into a parameterized
+# condition that one of the filter indexes can answer; an age range is matched
+# by its bucket (see migrate_page_indexes). With page=True a date range also
+# bounds the id, so a page can walk the id-ordered indexes.
+def parse_filters(args):
+    filters = {}
+    for name in ('from', 'to'):
+        try:
+            filters[name] = date.fromisoformat(args.get(name, '')).isoformat()
+        except ValueError:
+            pass
+    choices = {
+        'age': AGE_RANGES,
+        'gender': GENDERS,
+        'language': list(QUESTIONS),
+        'risk': ['1', '0'],
+        'support': SUPPORT_ANSWERS + ['none'],
+    }
+    for name, values in choices.items():
+        if args.get(name) in values:
+            filters[name] = args[name]
+    return filters
+
+def filter_sql(filters, page=False):
+    conditions = []
+    params = []
+    if 'from' in filters:
+        conditions.append('timestamp >= ?')
+        params.append(filters['from'])
+    if 'to' in filters:
+        conditions.append("timestamp < date(?, '+1 day')")
+        params.append(filters['to'])
+    if page and ('from' in filters or 'to' in filters):
+        days = [(f'day {operator} ?', filters[name]) for name, operator in (('from', '>='), ('to', '<=')) if name in filters]
+        days_sql = ' AND '.join(condition for condition, _ in days)
+        conditions.append(
+            f'id BETWEEN (SELECT MIN(first_id) FROM assessment_days WHERE {days_sql}) '
+            f'AND (SELECT MAX(last_id) FROM assessment_days WHERE {days_sql})'
+        )
+        params.extend([value for _, value in days] * 2)
+    if 'age' in filters:
+        conditions.append(f"{age_range_sql('age')} = ?")
+        params.append(filters['age'])
+    if 'gender' in filters:
+        conditions.append('gender = ?')
+        params.append(code_of(GENDERS, filters['gender']))
+    if 'language' in filters:
+        conditions.append('language = ?')
+        params.append(filters['language'])
+    if 'risk' in filters:
+        conditions.append('level = ?')
+        params.append(int(filters['risk']))
+    if filters.get('support') == 'none':
+        conditions.append('support IS NULL')
+    elif 'support' in filters:
+        conditions.append('support = ?')
+        params.append(code_of(SUPPORT_ANSWERS, filters['support']))
+    return ' AND '.join(conditions) or '1', params
+
+# Keyset pagination over the primary key, newest first. `after` continues with
+# older rows than the given id, `before` goes back to newer ones, so every page
+# is an index seek no matter how deep it is.
+def fetch_assessments_page(conn, after=None, before=None, limit=ADMIN_PAGE_SIZE, filters=None):
+    columns = SELECT_COLUMNS
+    where, params = filter_sql(filters or {}, page=True)
+    if before is not None:
+        rows = conn.execute(
+            f'SELECT {columns} FROM assessments WHERE id > ? AND {where} ORDER BY id ASC LIMIT ?',
+            (before, *params, limit + 1)
+        ).fetchall()
+        has_newer = len(rows) > limit
+        rows = rows[:limit][::-1]
+        has_older = True
+    else:
+        if after is not None:
+            cursor = conn.execute(
+                f'SELECT {columns} FROM assessments WHERE id < ? AND {where} ORDER BY id DESC LIMIT ?',
+                (after, *params, limit + 1)
+            )
+        else:
+            cursor = conn.execute(
+                f'SELECT {columns} FROM assessments WHERE {where} ORDER BY id DESC LIMIT ?', (*params, limit + 1)
+            )
+        rows = cursor.fetchall()
+        has_older = len(rows) > limit
+        rows = rows[:limit]
+        has_newer = after is not None
+
+    next_after = rows[-1][0] if rows and has_older else None
+    prev_before = rows[0][0] if rows and has_newer else None
+    return [decode_row(row) for row in rows], next_after, prev_before
+
+# Ids are assigned explicitly inside a BEGIN IMMEDIATE transaction, so a whole
+# batch goes in with one executemany and one commit and every caller still
+# learns the id of its own row.
+def insert_assessments(conn, rows):
+    last_id = conn.execute('''
+        SELECT MAX(
+            COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'assessments'), 0),
+            COALESCE((SELECT MAX(id) FROM assessments), 0)
+        )
+    ''').fetchone()[0]
+    ids = list(range(last_id + 1, last_id + 1 + len(rows)))
+    conn.executemany(
+        f"INSERT INTO assessments (id, {', '.join(INSERT_COLUMNS)}) VALUES ({', '.join('?' * (len(INSERT_COLUMNS) + 1))})",
+        [(assessment_id,) + tuple(row) for assessment_id, row in zip(ids, rows)]
+    )
+    return ids
+
+def write_assessments(conn, rows):
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        ids = insert_assessments(conn, rows)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return ids
+
+# Validation and scoring shared by every way an assessment can be submitted.
+# Each returns the error message to show instead of raising.
+def validate_profile(age, gender, language):
+    age = str(age or '').strip()
+    if not age or not age.isdigit():
+        return None, "Please enter a valid age." if language == 'en' else "Tafadhali weka umri sahihi."
+    if gender not in GENDERS:
+        return None, "Please select your gender." if language == 'en' else "Tafadhali chagua jinsia yako."
+    try:
+        age = int(age)
+    except ValueError:
+        return None, "Invalid age format." if language == 'en' else "Umri si wa sahihi."
+    if age < 13 or age > 35:
+        return None, "Only participants aged 13 to 35 are allowed." if language == 'en' else "Ni washiriki wa miaka 13 hadi 35 tu wanaoruhusiwa."
+    return age, None
+
+def risk_level(yes_count):
+    return 1 if yes_count >= 1 else 0
+
+def assessment_row(age, gender, language, responses, timestamp=None):
+    yes_count = sum(1 for r in responses if r == 'yes')
+    no_count = sum(1 for r in responses if r == 'no')
+    if len(responses) != QUESTION_COUNT or yes_count + no_count != QUESTION_COUNT:
+        return None, "Please answer all 10 questions." if language == 'en' else "Tafadhali jibu maswali yote 10."
+    return (age, code_of(GENDERS, gender), language, encode_answers(responses), QUESTION_SET_VERSION,
+            yes_count, no_count, risk_level(yes_count), None, timestamp or datetime.now()), None
+
+def consent_error(language):
+    return "Please agree to the terms to continue." if language == 'en' else "Tafadhali kubali masharti ili kuendelea."
+
+SYNC_MAX_BATCH = 100
+SYNC_MAX_AGE = timedelta(days=30)
+
+# Client timestamps are ISO 8601; ones with an offset are converted to the
+# server's local time, which is what datetime.now() stores.
+def parse_client_timestamp(value):
+    try:
+        timestamp = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone().replace(tzinfo=None)
+    return timestamp
+
+# Submissions made offline carry the device's time. It is kept when it is
+# plausible and replaced with the server time otherwise.
+def client_timestamp(value, now):
+    timestamp = parse_client_timestamp(value)
+    if timestamp is None or not now - SYNC_MAX_AGE <= timestamp <= now:
+        return now
+    return timestamp
+
+def record_row(record, now):
+    if not isinstance(record, dict):
+        return None, "Each assessment must be a JSON object."
+    language = record.get('language')
+    if language not in QUESTIONS:
+        return None, "Unsupported language."
+    if record.get('agree') not in ('yes', True):
+        return None, consent_error(language)
+    age, error = validate_profile(record.get('age'), record.get('gender'), language)
+    if error is not None:
+        return None, error
+    responses = record.get('responses')
+    if not isinstance(responses, list):
+        responses = []
+    return assessment_row(age, record.get('gender'), language, responses, client_timestamp(record.get('timestamp'), now))
+
+INGEST_CLOCK_SKEW = timedelta(minutes=5)
+
+# Records sent by field teams: the fields stored by assessment() plus support
+# and the time the survey was taken. Counts and level are optional, but when
+# present they must agree with the responses.
+def ingest_row(record, now):
+    if not isinstance(record, dict):
+        return None, "Each assessment must be a JSON object."
+    language = record.get('language')
+    if language not in QUESTIONS:
+        return None, "Unsupported language."
+    age, error = validate_profile(record.get('age'), record.get('gender'), language)
+    if error is not None:
+        return None, error
+    support = record.get('support')
+    if support not in (None, 'yes', 'no'):
+        return None, "support must be 'yes', 'no' or null."
+    timestamp = now
+    if record.get('timestamp') is not None:
+        timestamp = parse_client_timestamp(record['timestamp'])
+        if timestamp is None:
+            return None, "Invalid timestamp."
+        if timestamp > now + INGEST_CLOCK_SKEW:
+            return None, "Timestamp is in the future."
+    responses = record.get('responses')
+    row, error = assessment_row(age, record['gender'], language, responses if isinstance(responses, list) else [], timestamp)
+    if error is not None:
+        return None, error
+    for field, value in (('yes_count', row[5]), ('no_count', row[6]), ('level', level_label(row[7], language))):
+        if record.get(field) is not None and record[field] != value:
+            return None, f"{field} does not match the responses."
+    return row[:8] + (code_of(SUPPORT_ANSWERS, support),) + row[9:], None
+
+# Records from the old JSON storage: string ages, lowercase genders and a
+# risk_level string that is recomputed from the responses.
+def legacy_row(record, now):
+    if not isinstance(record, dict):
+        return None, "Each record must be a JSON object."
+    language = record.get('language') or 'en'
+    if language not in QUESTIONS:
+        return None, "Unsupported language."
+    gender = str(record.get('gender') or '').strip().capitalize()
+    age, error = validate_profile(record.get('age'), gender, 'en')
+    if error is not None:
+        return None, error
+    timestamp = parse_client_timestamp(record.get('timestamp'))
+    if timestamp is None:
+        return None, "Invalid timestamp."
+    responses = record.get('responses')
+    if not isinstance(responses, list):
+        responses = []
+    return assessment_row(age, gender, language, [str(r).strip().lower() for r in responses], timestamp)
+
+# Inserts validated rows in one transaction. Rows with a client_id that was
+# stored before are skipped; each row gets ('stored', id) or ('duplicate', None).
+def store_records(conn, pending):
+    client_ids = [client_id for client_id, _ in pending if client_id is not None]
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        known = set()
+        for start in range(0, len(client_ids), 500):
+            chunk = client_ids[start:start + 500]
+            known.update(
+                client_id for client_id, in
+                conn.execute(f"SELECT client_id FROM synced_submissions WHERE client_id IN ({', '.join('?' * len(chunk))})", chunk)
+            )
+        new = [(client_id, row) for client_id, row in pending if client_id not in known]
+        ids = insert_assessments(conn, [row for _, row in new])
+        conn.executemany(
+            'INSERT INTO synced_submissions (client_id, assessment_id) VALUES (?, ?)',
+            [(client_id, assessment_id) for (client_id, _), assessment_id in zip(new, ids) if client_id is not None]
+        )
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    ids = iter(ids)
+    return [('duplicate', None) if client_id in known else ('stored', next(ids)) for client_id, _ in pending]
+
+# Validates every record with parse_record(record, now) and stores the valid
+# ones together. Returns one result per record, in input order.
+def ingest_records(records, parse_record, require_client_id=False):
+    now = datetime.now()
+    results = []
+    pending = []
+    waiting = []
+    seen = set()
+    for index, record in enumerate(records):
+        client_id = record.get('client_id') if isinstance(record, dict) else None
+        result = {'index': index, 'client_id': client_id}
+        results.append(result)
+        if client_id is None and require_client_id:
+            result.update(status='invalid', error="Missing client_id.")
+            continue
+        if client_id is not None and (not isinstance(client_id, str) or not 0 < len(client_id) <= 64):
+            result.update(status='invalid', error="client_id must be a string of 1 to 64 characters.")
+            continue
+        row, error = parse_record(record, now)
+        if error is not None:
+            result.update(status='invalid', error=error)
+        elif client_id is not None and client_id in seen:
+            result.update(status='duplicate')
+        else:
+            seen.add(client_id)
+            pending.append((client_id, row))
+            waiting.append(result)
+
+    if pending:
+        for result, (status, assessment_id) in zip(waiting, store_records(get_db(), pending)):
+            result['status'] = status
+            if assessment_id is not None:
+                result['id'] = assessment_id
+    return results
+
+_write_queue = None
+_write_queue_pid = None
+_write_thread = None
+_write_queue_lock = threading.Lock()
+
+def get_write_queue():
+    global _write_queue, _write_queue_pid, _write_thread
+    with _write_queue_lock:
+        if _write_queue is None or _write_queue_pid != os.getpid():
+            _write_queue = queue.Queue()
+            _write_queue_pid = os.getpid()
+            _write_thread = None
+        # A writer that died is replaced, so queued rows are not left waiting.
+        if _write_thread is None or not _write_thread.is_alive():
+            _write_thread = threading.Thread(target=run_writer, args=(_write_queue,), name='assessment-writer', daemon=True)
+            _write_thread.start()
+        return _write_queue
+
+def run_writer(write_queue):
+    conn = None
+    batch_size = app.config['WRITE_BATCH_SIZE']
+    delay = app.config['WRITE_BATCH_DELAY']
+    while True:
+        batch = [write_queue.get()]
+        deadline = time.monotonic() + delay
+        while len(batch) < batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(write_queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        # Callers that gave up waiting cancel their future; skip those rows.
+        batch = [(row, future) for row, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            continue
+        try:
+            if conn is None:
+                conn = connect_db()
+            ids = write_assessments(conn, [row for row, _ in batch])
+        except BaseException as e:
+            for _, future in batch:
+                future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+        else:
+            for (_, future), assessment_id in zip(batch, ids):
+                future.set_result(assessment_id)
+
+def save_assessment(row):
+    if app.config['WRITE_BEHIND']:
+        future = Future()
+        get_write_queue().put((row, future))
+        try:
+            return future.result(timeout=app.config['WRITE_TIMEOUT'])
+        except TimeoutError:
+            # Once the writer has picked the row up it will be committed, so
+            # wait (once more, bounded) for its id rather than report a
+            # failure the user retries.
+            if future.cancel():
+                raise
+            return future.result(timeout=app.config['WRITE_TIMEOUT'])
+    return write_assessments(get_db(), [row])[0]
+
+CSV_BATCH_SIZE = 1000
+
+def format_csv(rows, header=False):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    if header:
+        writer.writerow(ASSESSMENT_COLUMNS)
+    writer.writerows(row[:4] + (json.dumps(decode_answers(row[4])),) + row[5:] for row in map(label_row, rows))
+    return buffer.getvalue().encode('utf-8')
+
+EXPORT_CHECKPOINT_ROWS = 10000
+
+# /download_csv serves a file kept in EXPORT_DIR. Its metadata records the
+# highest id in the file, the support_changes version it reflects, its
+# published size and a byte offset every EXPORT_CHECKPOINT_ROWS ids. New rows
+# are appended in place; readers never go past the size they were given, so
+# an append cannot show up half-written. A changed support answer means the
+# file is copied up to the last checkpoint before that row, finished from the
+# database and renamed over the old one, which readers keep open. The
+# metadata also names the database the file was built from, so pointing
+# EXPORT_DIR at a directory filled from another database starts over.
+def csv_artifact_paths():
+    directory = app.config['EXPORT_DIR'] or os.path.splitext(app.config['DATABASE'])[0] + '.exports'
+    path = os.path.join(directory, 'gbv_assessments.csv')
+    return path, path + '.json', path + '.lock'
+
+# The database path and inode, so the file is rebuilt when the database is
+# replaced, e.g. restored from a backup, even if its ids line up.
+def database_identity():
+    path = os.path.abspath(app.config['DATABASE'])
+    return f'{path}:{os.stat(path).st_ino}'
+
+def load_artifact_meta(path, meta_path):
+    try:
+        with open(meta_path) as handle:
+            meta = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    if meta.get('columns') != ASSESSMENT_COLUMNS or meta.get('database') != database_identity():
+        return None
+    if not os.path.exists(path):
+        return None
+    return meta
+
+def save_artifact_meta(meta_path, meta):
+    with open(meta_path + '.tmp', 'w') as handle:
+        json.dump(meta, handle)
+    os.replace(meta_path + '.tmp', meta_path)
+
+def append_csv_rows(conn, handle, meta, max_id):
+    cursor = conn.execute(
+        f'SELECT {SELECT_COLUMNS} FROM assessments WHERE id > ? AND id <= ? ORDER BY id', (meta['max_id'], max_id)
+    )
+    try:
+        while True:
+            rows = cursor.fetchmany(CSV_BATCH_SIZE)
+            if not rows:
+                break
+            handle.write(format_csv(rows))
+            if rows[-1][0] - meta['checkpoints'][-1][0] >= EXPORT_CHECKPOINT_ROWS:
+                meta['checkpoints'].append([rows[-1][0], handle.tell()])
+    finally:
+        cursor.close()
+    meta['max_id'] = max_id
+    meta['size'] = handle.tell()
+    meta['modified'] = int(time.time())
+
+def rewrite_csv_artifact(conn, path, meta, checkpoint, max_id):
+    with open(path + '.tmp', 'wb') as target:
+        if meta is None:
+            target.write(format_csv([], header=True))
+            meta = {
+                'columns': ASSESSMENT_COLUMNS,
+                'database': database_identity(),
+                'max_id': 0,
+                'checkpoints': [[0, target.tell()]],
+            }
+        else:
+            meta['checkpoints'] = meta['checkpoints'][:meta['checkpoints'].index(checkpoint) + 1]
+            meta['max_id'] = checkpoint[0]
+            with open(path, 'rb') as source:
+                remaining = checkpoint[1]
+                while remaining:
+                    chunk = source.read(min(remaining, 1 << 20))
+                    target.write(chunk)
+                    remaining -= len(chunk)
+        append_csv_rows(conn, target, meta, max_id)
+    os.replace(path + '.tmp', path)
+    return meta
+
+# Brings the file up to date and returns it opened for reading, with its
+# metadata. Callers must not read past meta['size'].
+def open_csv_artifact(conn):
+    path, meta_path, lock_path = csv_artifact_paths()
+    try:
+        lock = open(lock_path, 'a')
+    except FileNotFoundError:
+        # First export: the directory is created along with the file.
+        os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+        lock = open(lock_path, 'a')
+    with lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        # The version is read before the rows, so a support answer changed
+        # in between is picked up again on the next request.
+        version = conn.execute('SELECT COALESCE(MAX(version), 0) FROM support_changes').fetchone()[0]
+        max_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM assessments').fetchone()[0]
+        meta = load_artifact_meta(path, meta_path)
+        if meta is not None and (meta['max_id'] > max_id or meta['version'] > version):
+            meta = None
+
+        if meta is None or meta['version'] != version or meta['max_id'] < max_id:
+            if meta is None:
+                meta = rewrite_csv_artifact(conn, path, None, None, max_id)
+            elif meta['version'] != version:
+                first_changed = conn.execute(
+                    'SELECT MIN(assessment_id) FROM support_changes WHERE version > ?', (meta['version'],)
+                ).fetchone()[0]
+                if first_changed <= meta['max_id']:
+                    checkpoint = [c for c in meta['checkpoints'] if c[0] < first_changed][-1]
+                    meta = rewrite_csv_artifact(conn, path, meta, checkpoint, max_id)
+            if meta['max_id'] < max_id:
+                with open(path, 'r+b') as handle:
+                    handle.truncate(meta['size'])
+                    handle.seek(meta['size'])
+                    append_csv_rows(conn, handle, meta, max_id)
+            meta['version'] = version
+            save_artifact_meta(meta_path, meta)
+        return open(path, 'rb'), meta
+
+EXPORT_BATCH_SIZE = 10000
+EXPORT_COLUMNS = ['id', 'age', 'gender', 'language'] + [f'q{i + 1}' for i in range(QUESTION_COUNT)] + ['yes_count', 'no_count', 'level', 'support', 'timestamp']
+
+def parse_timestamp(value):
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
+# Columnar exports expand the answers bitmask into one boolean column per
+# question (None when the answers are missing).
+def export_batch(rows):
+    columns = {name: [] for name in EXPORT_COLUMNS}
+    for id, age, gender, language, answers, yes_count, no_count, level, support, timestamp in map(label_row, rows):
+        columns['id'].append(id)
+        columns['age'].append(age)
+        columns['gender'].append(gender)
+        columns['language'].append(language)
+        for i in range(QUESTION_COUNT):
+            columns[f'q{i + 1}'].append(bool(answers >> i & 1) if answers is not None else None)
+        columns['yes_count'].append(yes_count)
+        columns['no_count'].append(no_count)
+        columns['level'].append(level)
+        columns['support'].append(support)
+        columns['timestamp'].append(timestamp)
+    return columns
+
+def iter_export_batches(cursor, batch_size=EXPORT_BATCH_SIZE):
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        yield export_batch(rows)
+
+def iter_ndjson(cursor, batch_size=EXPORT_BATCH_SIZE):
+    for columns in iter_export_batches(cursor, batch_size):
+        lines = [
+            json.dumps(dict(zip(EXPORT_COLUMNS, values)), ensure_ascii=False)
+            for values in zip(*columns.values())
+        ]
+        yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+def export_schema(pa):
+    fields = [('id', pa.int64()), ('age', pa.int64()), ('gender', pa.string()), ('language', pa.string())]
+    fields += [(f'q{i + 1}', pa.bool_()) for i in range(QUESTION_COUNT)]
+    fields += [('yes_count', pa.int64()), ('no_count', pa.int64()), ('level', pa.string()),
+               ('support', pa.string()), ('timestamp', pa.timestamp('us'))]
+    return pa.schema(fields)
+
+def write_columnar(cursor, output, fmt, batch_size=EXPORT_BATCH_SIZE):
+    import pyarrow as pa
+
+    schema = export_schema(pa)
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(output, schema, compression='zstd')
+    else:
+        writer = pa.ipc.new_file(output, schema)
+    with writer:
+        for columns in iter_export_batches(cursor, batch_size):
+            columns['timestamp'] = [parse_timestamp(value) for value in columns['timestamp']]
+            writer.write_batch(pa.record_batch(list(columns.values()), schema=schema))
+
+# Daily and weekly trend rollups are filled incrementally: only days that have
+# rows past the stored watermark, or that had a support answer change since
+# the last run, are recomputed (one index range per day). Weeks are then
+# re-summed from their daily rows.
+ROLLUP_SUMS = '''
+    COUNT(*),
+    TOTAL(level = 1),
+    TOTAL(support = 1),
+    TOTAL(support IS NOT NULL)
+'''
+def week_start(day):
+    day = date.fromisoformat(day)
+    return (day - timedelta(days=day.weekday())).isoformat()
+
+def refresh_trends(conn):
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        row = conn.execute("SELECT last_id FROM rollup_watermarks WHERE name = 'trends'").fetchone()
+        watermark = row[0] if row else 0
+        last_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM assessments').fetchone()[0]
+        days = {day for (day,) in conn.execute(
+            'SELECT DISTINCT date(timestamp) FROM assessments WHERE id > ? AND timestamp IS NOT NULL', (watermark,)
+        )}
+        days |= {day for (day,) in conn.execute('SELECT day FROM rollup_dirty_days')}
+        days.discard(None)
+
+        for day in days:
+            conn.execute('DELETE FROM daily_rollups WHERE day = ?', (day,))
+            conn.execute(f'''
+                INSERT INTO daily_rollups
+                SELECT ?, COALESCE(language, ''), {age_range_sql('age')}, COALESCE(gender, -1), {ROLLUP_SUMS}
+                FROM assessments
+                WHERE timestamp >= ? AND timestamp < date(?, '+1 day')
+                GROUP BY 2, 3, 4
+            ''', (day, day, day))
+
+        weeks = {week_start(day) for day in days}
+        for week in weeks:
+            conn.execute('DELETE FROM weekly_rollups WHERE week = ?', (week,))
+            conn.execute('''
+                INSERT INTO weekly_rollups
+                SELECT ?, language, age_range, gender,
+                       SUM(assessments), SUM(risk), SUM(support_yes), SUM(support_answered)
+                FROM daily_rollups
+                WHERE day >= ? AND day < date(?, '+7 days')
+                GROUP BY language, age_range, gender
+            ''', (week, week, week))
+
+        conn.execute('DELETE FROM rollup_dirty_days')
+        conn.execute(
+            "INSERT INTO rollup_watermarks (name, last_id) VALUES ('trends', ?) "
+            "ON CONFLICT (name) DO UPDATE SET last_id = excluded.last_id",
+            (last_id,)
+        )
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return len(days), len(weeks)
 
-init_db()
+# The rollups cannot be filtered by risk, support or part of a day, so a
+# filtered dashboard sums the matching rows directly instead.
+def trend_series(conn, days=30, weeks=12, where=None, params=()):
+    daily = {'labels': [], 'en': [], 'sw': [], 'risk_rate': [], 'support_rate': []}
+    if where:
+        rows = conn.execute(f'''
+            SELECT date(timestamp), COALESCE(language, ''), {ROLLUP_SUMS}
+            FROM assessments
+            WHERE timestamp >= date('now', 'localtime', ?, '+1 day') AND {where}
+            GROUP BY 1, 2
+            ORDER BY 1
+        ''', (f'-{days} days', *params)).fetchall()
+    else:
+        rows = conn.execute('''
+            SELECT day, language, SUM(assessments), SUM(risk), SUM(support_yes), SUM(support_answered)
+            FROM daily_rollups
+            WHERE day > date('now', 'localtime', ?)
+            GROUP BY day, language
+            ORDER BY day
+        ''', (f'-{days} days',)).fetchall()
+    by_day = {}
+    for day, language, count, risk, support_yes, support_answered in rows:
+        totals = by_day.setdefault(day, {'en': 0, 'sw': 0, 'count': 0, 'risk': 0, 'support_yes': 0, 'support_answered': 0})
+        if language in ('en', 'sw'):
+            totals[language] += count
+        totals['count'] += count
+        totals['risk'] += risk
+        totals['support_yes'] += support_yes
+        totals['support_answered'] += support_answered
+    for day, totals in by_day.items():
+        daily['labels'].append(day)
+        daily['en'].append(totals['en'])
+        daily['sw'].append(totals['sw'])
+        daily['risk_rate'].append(round(totals['risk'] / totals['count'] * 100, 1) if totals['count'] else 0)
+        daily['support_rate'].append(
+            round(totals['support_yes'] / totals['support_answered'] * 100, 1) if totals['support_answered'] else 0
+        )
+
+    weekly = {'labels': [], 'count': [], 'risk_rate': [], 'support_rate': []}
+    if where:
+        rows = conn.execute(f'''
+            SELECT date(timestamp, 'weekday 0', '-6 days') AS week, {ROLLUP_SUMS}
+            FROM assessments
+            WHERE timestamp > date('now', 'localtime', ?1) AND {where}
+            GROUP BY week
+            HAVING week > date('now', 'localtime', ?1)
+            ORDER BY week
+        ''', (f'-{weeks * 7} days', *params)).fetchall()
+    else:
+        rows = conn.execute('''
+            SELECT week, SUM(assessments), SUM(risk), SUM(support_yes), SUM(support_answered)
+            FROM weekly_rollups
+            WHERE week > date('now', 'localtime', ?)
+            GROUP BY week
+            ORDER BY week
+        ''', (f'-{weeks * 7} days',)).fetchall()
+    for week, count, risk, support_yes, support_answered in rows:
+        weekly['labels'].append(week)
+        weekly['count'].append(count)
+        weekly['risk_rate'].append(round(risk / count * 100, 1) if count else 0)
+        weekly['support_rate'].append(round(support_yes / support_answered * 100, 1) if support_answered else 0)
+    return {'daily': daily, 'weekly': weekly}
+
+def dashboard_stats(conn, where=None, params=()):
+    if where:
+        cursor = conn.execute(f'''
+            SELECT {age_range_sql('age')}, COALESCE(gender, -1), COUNT(*), TOTAL(level = 1)
+            FROM assessments
+            WHERE {where}
+            GROUP BY 1, 2
+        ''', params)
+    else:
+        cursor = conn.execute(
+            'SELECT age_range, gender, SUM(count), TOTAL(risk * count) FROM assessment_stats GROUP BY age_range, gender'
+        )
+    age_ranges = {age_range: {gender: 0 for gender in GENDERS} for age_range in AGE_RANGES}
+    risk_count = total = 0
+    for age_range, gender, count, risk in cursor:
+        if age_range in age_ranges and 0 <= gender < len(GENDERS):
+            age_ranges[age_range][GENDERS[gender]] = count
+        risk_count += risk
+        total += count
+
+    risk_data = {
+        'risk': risk_count / total * 100 if total > 0 else 0,
+        'no_risk': (total - risk_count) / total * 100 if total > 0 else 0
+    }
+    return age_ranges, risk_data, int(total)
 
 QUESTIONS = {
     'en': [
@@ -58,6 +1353,13 @@ QUESTIONS = {
     ]
 }
 
+# Breakdowns of the per-question table on the admin dashboard.
+QUESTION_GROUPS = {
+    'age_range': AGE_RANGES,
+    'gender': GENDERS,
+    'language': list(QUESTIONS),
+}
+
 NAVBAR_TEMPLATE = """
 <!DOCTYPE html>
 <html lang="{{ language }}">
@@ -65,181 +1367,9 @@ NAVBAR_TEMPLATE = """
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0, maximum-scale=1.0, user-scalable=no">
     <title>GBV Helper</title>
-    <script src="https://cdn.tailwindcss.com"></script>
-    <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
-    <style>
-        :root {
-            --primary: #1d4ed8;
-            --secondary: #3b82f6;
-            --accent: #f43f5e;
-            --bg-light: #f3f4f6;
-            --text-dark: #1f2937;
-        }
-        body {
-            font-family: 'Inter', -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-            background: linear-gradient(to bottom, var(--bg-light), #ffffff);
-        }
-        .container {
-            max-width: 1200px;
-            padding: 0.5rem;
-            margin: 0 auto;
-        }
-        .navbar {
-            position: sticky;
-            top: 0;
-            z-index: 50;
-            background: linear-gradient(to right, var(--primary), var(--secondary));
-            box-shadow: 0 1px 3px rgba(0, 0, 0, 0.1);
-            transition: all 0.3s ease;
-            padding: 0.5rem 0;
-        }
-        .navbar-brand {
-            font-size: 1.25rem;
-            font-weight: 700;
-            color: white;
-            transition: color 0.2s ease;
-        }
-        .navbar-brand:hover {
-            color: #dbeafe;
-        }
-        .navbar-menu {
-            display: flex;
-            flex-direction: column;
-            gap: 0.5rem;
-        }
-        .nav-link {
-            color: white;
-            font-size: 0.875rem;
-            padding: 0.25rem 0.75rem;
-            border-radius: 0.25rem;
-            transition: background-color 0.2s ease, transform 0.2s ease;
-        }
-        .nav-link:hover {
-            background-color: rgba(255, 255, 255, 0.1);
-            transform: translateY(-2px);
-        }
-        @media (min-width: 640px) {
-            .navbar-menu {
-                flex-direction: row;
-                gap: 1rem;
-            }
-            .navbar-brand {
-                font-size: 1.5rem;
-            }
-        }
-        @media (min-width: 1024px) {
-            .navbar-brand {
-                font-size: 1.75rem;
-            }
-        }
-        .form-input {
-            padding: 0.75rem;
-            font-size: 1rem;
-            border: 2px solid #d1d5db;
-            border-radius: 0.5rem;
-            transition: border-color 0.2s ease, box-shadow 0.2s ease;
-            width: 100%;
-        }
-        .form-input:focus {
-            border-color: var(--primary);
-            box-shadow: 0 0 0 3px rgba(29, 78, 216, 0.2);
-            outline: none;
-        }
-        .form-button {
-            padding: 0.75rem 1.5rem;
-            font-size: 1rem;
-            font-weight: 600;
-            border-radius: 0.5rem;
-            background: var(--primary);
-            color: white;
-            transition: background-color 0.2s ease, transform 0.2s ease;
-        }
-        .form-button:hover {
-            background: var(--secondary);
-            transform: translateY(-2px);
-        }
-        .form-button:active {
-            transform: translateY(0);
-        }
-        .chart-container {
-            max-width: 100%;
-            height: auto;
-            margin: 0 auto;
-            background: white;
-            padding: 1.5rem;
-            border-radius: 0.5rem;
-            box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-        }
-        canvas {
-            max-height: 350px !important;
-            width: 100% !important;
-        }
-        .card {
-            background: white;
-            border-radius: 0.75rem;
-            box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-            transition: transform 0.3s ease, box-shadow 0.3s ease;
-        }
-        .card:hover {
-            transform: translateY(-5px);
-            box-shadow: 0 6px 12px rgba(0, 0, 0, 0.15);
-        }
-        .text-sm { font-size: 0.875rem; }
-        .text-base { font-size: 1rem; }
-        .text-lg { font-size: 1.125rem; }
-        .text-xl { font-size: 1.25rem; }
-        .text-2xl { font-size: 1.5rem; }
-        .text-3xl { font-size: 1.875rem; }
-        @media (min-width: 640px) {
-            .text-sm { font-size: 0.9375rem; }
-            .text-base { font-size: 1.125rem; }
-            .text-lg { font-size: 1.25rem; }
-            .text-xl { font-size: 1.5rem; }
-            .text-2xl { font-size: 1.75rem; }
-            .text-3xl { font-size: 2.25rem; }
-        }
-        @media (min-width: 1024px) {
-            .text-sm { font-size: 1rem; }
-            .text-base { font-size: 1.25rem; }
-            .text-lg { font-size: 1.5rem; }
-            .text-xl { font-size: 1.75rem; }
-            .text-2xl { font-size: 2rem; }
-            .text-3xl { font-size: 2.5rem; }
-        }
-        @media (max-width: 640px) {
-            .p-8 { padding: 1rem; }
-            .p-6 { padding: 0.75rem; }
-            .max-w-4xl { max-width: 100%; }
-            .grid-cols-3 { grid-template-columns: 1fr; }
-            .grid-cols-2 { grid-template-columns: 1fr; }
-            .space-x-4 > * + * { margin-left: 0; margin-top: 0.75rem; }
-            .flex-row { flex-direction: column; }
-            .table { font-size: 0.75rem; }
-            .table th, .table td { padding: 0.5rem; }
-        }
-        .radio-group {
-            display: flex;
-            gap: 1rem;
-            align-items: center;
-        }
-        .radio-label {
-            display: flex;
-            align-items: center;
-            padding: 0.5rem 1rem;
-            border: 2px solid #d1d5db;
-            border-radius: 0.5rem;
-            cursor: pointer;
-            transition: all 0.2s ease;
-        }
-        .radio-label:hover {
-            background: #f3f4f6;
-        }
-        .radio-label input:checked + span {
-            color: var(--primary);
-            font-weight: 600;
-        }
-    </style>
-    <link href="https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&display=swap" rel="stylesheet">
+    <link rel="stylesheet" href="{{ asset_url('app.css') }}">
+    <link rel="manifest" href="/manifest.webmanifest">
+    <meta name="theme-color" content="#1d4ed8">
 </head>
 <body class="bg-gray-100 flex flex-col min-h-screen">
     <nav class="navbar text-white">
@@ -272,6 +1402,17 @@ FOOTER_TEMPLATE = """
             </p>
         </div>
     </footer>
+    <script>
+        if ('serviceWorker' in navigator) {
+            navigator.serviceWorker.register('/sw.js').then(function () {
+                return navigator.serviceWorker.ready;
+            }).then(function (registration) {
+                var flush = function () { registration.active.postMessage('sync'); };
+                window.addEventListener('online', flush);
+                if (navigator.onLine) flush();
+            });
+        }
+    </script>
 </body>
 </html>
 """
@@ -344,6 +1485,9 @@ ABOUT_TEMPLATE = """
                         <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M9 5l7 7-7 7"></path>
                     </svg>
                 </a>
+                <p class="text-sm text-gray-600 mt-4">
+                    <a href="/assessment/quick?lang={{ language }}" class="underline hover:text-blue-600 transition-colors">{{ 'Slow connection? Answer everything on one page' if language == 'en' else 'Mtandao wa polepole? Jibu kila kitu kwenye ukurasa mmoja' }}</a>
+                </p>
             </div>
         </div>
     </div>
@@ -429,25 +1573,177 @@ ADMIN_TEMPLATE = """
 <main class="flex-grow">
     <div class="container p-6">
         <div class="card p-8">
-            <h1 class="text-3xl font-bold mb-8 text-center text-gray-800">{{ 'GBV Assessment Admin Dashboard' if language == 'en' else 'Dashibodi ya Msimamizi wa Tathmini ya GBV' }}</h1>
+            <h1 class="text-3xl font-bold mb-2 text-center text-gray-800">{{ 'GBV Assessment Admin Dashboard' if language == 'en' else 'Dashibodi ya Msimamizi wa Tathmini ya GBV' }}</h1>
+            {% set max_minutes = (snapshot_max_age / 60) | round(0, 'ceil') | int %}
+            <p class="text-sm text-gray-500 text-center mb-8">
+                {% if language == 'en' %}
+                Data as of {{ data_as_of.strftime('%Y-%m-%d %H:%M:%S') }} (refreshed once it is {{ max_minutes }} min old or {{ snapshot_max_rows }} assessments behind)
+                {% else %}
+                Takwimu kufikia {{ data_as_of.strftime('%Y-%m-%d %H:%M:%S') }} (husasishwa baada ya dakika {{ max_minutes }} au tathmini mpya {{ snapshot_max_rows }})
+                {% endif %}
+            </p>
+            <form method="get" action="{{ url_for('admin_dashboard') }}" class="grid grid-cols-1 sm:grid-cols-2 lg:grid-cols-4 gap-4 mb-4 items-end">
+                <input type="hidden" name="limit" value="{{ limit }}">
+                <div>
+                    <label for="from" class="block text-sm font-medium text-gray-700 mb-1">{{ 'From' if language == 'en' else 'Kuanzia' }}</label>
+                    <input type="date" name="from" id="from" value="{{ filters.get('from', '') }}" class="form-input">
+                </div>
+                <div>
+                    <label for="to" class="block text-sm font-medium text-gray-700 mb-1">{{ 'To' if language == 'en' else 'Hadi' }}</label>
+                    <input type="date" name="to" id="to" value="{{ filters.get('to', '') }}" class="form-input">
+                </div>
+                <div>
+                    <label for="age" class="block text-sm font-medium text-gray-700 mb-1">{{ 'Age Range' if language == 'en' else 'Rangi ya Umri' }}</label>
+                    <select name="age" id="age" class="form-input">
+                        <option value="">{{ 'All' if language == 'en' else 'Wote' }}</option>
+                        {% for age_range in age_ranges %}
+                        <option value="{{ age_range }}" {{ 'selected' if filters.get('age') == age_range else '' }}>{{ age_range }}</option>
+                        {% endfor %}
+                    </select>
+                </div>
+                <div>
+                    <label for="gender" class="block text-sm font-medium text-gray-700 mb-1">{{ 'Gender' if language == 'en' else 'Jinsia' }}</label>
+                    <select name="gender" id="gender" class="form-input">
+                        <option value="">{{ 'All' if language == 'en' else 'Wote' }}</option>
+                        <option value="Male" {{ 'selected' if filters.get('gender') == 'Male' else '' }}>{{ 'Male' if language == 'en' else 'Mwanaume' }}</option>
+                        <option value="Female" {{ 'selected' if filters.get('gender') == 'Female' else '' }}>{{ 'Female' if language == 'en' else 'Mwanamke' }}</option>
+                    </select>
+                </div>
+                <div>
+                    <label for="language" class="block text-sm font-medium text-gray-700 mb-1">{{ 'Language' if language == 'en' else 'Lugha' }}</label>
+                    <select name="language" id="language" class="form-input">
+                        <option value="">{{ 'All' if language == 'en' else 'Wote' }}</option>
+                        <option value="en" {{ 'selected' if filters.get('language') == 'en' else '' }}>{{ 'English' if language == 'en' else 'Kiingereza' }}</option>
+                        <option value="sw" {{ 'selected' if filters.get('language') == 'sw' else '' }}>Kiswahili</option>
+                    </select>
+                </div>
+                <div>
+                    <label for="risk" class="block text-sm font-medium text-gray-700 mb-1">{{ 'Risk Level' if language == 'en' else 'Kiwango cha Hatari' }}</label>
+                    <select name="risk" id="risk" class="form-input">
+                        <option value="">{{ 'All' if language == 'en' else 'Wote' }}</option>
+                        <option value="1" {{ 'selected' if filters.get('risk') == '1' else '' }}>{{ 'GBV Risk' if language == 'en' else 'Hatari ya GBV' }}</option>
+                        <option value="0" {{ 'selected' if filters.get('risk') == '0' else '' }}>{{ 'No Risk' if language == 'en' else 'Hakuna Hatari' }}</option>
+                    </select>
+                </div>
+                <div>
+                    <label for="support" class="block text-sm font-medium text-gray-700 mb-1">{{ 'Support' if language == 'en' else 'Msaada' }}</label>
+                    <select name="support" id="support" class="form-input">
+                        <option value="">{{ 'All' if language == 'en' else 'Wote' }}</option>
+                        <option value="yes" {{ 'selected' if filters.get('support') == 'yes' else '' }}>{{ 'Accepted' if language == 'en' else 'Walikubali' }}</option>
+                        <option value="no" {{ 'selected' if filters.get('support') == 'no' else '' }}>{{ 'Declined' if language == 'en' else 'Walikataa' }}</option>
+                        <option value="none" {{ 'selected' if filters.get('support') == 'none' else '' }}>{{ 'Not Selected' if language == 'en' else 'Haikuchaguliwa' }}</option>
+                    </select>
+                </div>
+                <div class="flex items-center gap-4">
+                    <button type="submit" class="form-button">{{ 'Apply Filters' if language == 'en' else 'Tumia Vichujio' }}</button>
+                    <a href="{{ url_for('admin_dashboard', limit=limit) }}" class="underline hover:text-blue-600">{{ 'Clear' if language == 'en' else 'Futa' }}</a>
+                </div>
+            </form>
+            <p class="text-sm text-gray-600 mb-8">
+                {% if filters %}
+                {{ 'Charts and the table below show only the filtered assessments.' if language == 'en' else 'Chati na jedwali hapa chini zinaonyesha tathmini zilizochujwa pekee.' }}
+                {% else %}
+                {{ 'Showing all assessments.' if language == 'en' else 'Inaonyesha tathmini zote.' }}
+                {% endif %}
+            </p>
             <div class="grid grid-cols-1 lg:grid-cols-2 gap-8 mb-8">
                 <div class="chart-container">
                     <h2 class="text-xl font-semibold mb-4 text-center text-gray-800">{{ 'Assessments by Age Range and Gender' if language == 'en' else 'Tathmini kwa Rangi ya Umri na Jinsia' }}</h2>
                     <canvas id="ageGenderChart"></canvas>
-                    {% if not assessments %}
+                    {% if not total %}
                     <p class="text-center text-gray-500 text-sm mt-4">{{ 'No data available for charts.' if language == 'en' else 'Hakuna data inapatikana kwa chati.' }}</p>
                     {% endif %}
                 </div>
                 <div class="chart-container">
                     <h2 class="text-xl font-semibold mb-4 text-center text-gray-800">{{ 'GBV Risk vs No Risk (Percentage)' if language == 'en' else 'Hatari ya GBV dhidi ya Hakuna Hatari (Asilimia)' }}</h2>
                     <canvas id="riskChart"></canvas>
-                    {% if not assessments %}
+                    {% if not total %}
+                    <p class="text-center text-gray-500 text-sm mt-4">{{ 'No data available for charts.' if language == 'en' else 'Hakuna data inapatikana kwa chati.' }}</p>
+                    {% endif %}
+                </div>
+            </div>
+            <div class="grid grid-cols-1 lg:grid-cols-2 gap-8 mb-8">
+                <div class="chart-container">
+                    <h2 class="text-xl font-semibold mb-4 text-center text-gray-800">{{ 'Daily Assessments (Last 30 Days)' if language == 'en' else 'Tathmini za Kila Siku (Siku 30 Zilizopita)' }}</h2>
+                    <canvas id="dailyTrendChart"></canvas>
+                    {% if not trends.daily.labels %}
+                    <p class="text-center text-gray-500 text-sm mt-4">{{ 'No data available for charts.' if language == 'en' else 'Hakuna data inapatikana kwa chati.' }}</p>
+                    {% endif %}
+                </div>
+                <div class="chart-container">
+                    <h2 class="text-xl font-semibold mb-4 text-center text-gray-800">{{ 'Weekly Risk and Support Acceptance Rates (%)' if language == 'en' else 'Viwango vya Hatari na Kukubali Msaada kwa Wiki (%)' }}</h2>
+                    <canvas id="weeklyTrendChart"></canvas>
+                    {% if not trends.weekly.labels %}
                     <p class="text-center text-gray-500 text-sm mt-4">{{ 'No data available for charts.' if language == 'en' else 'Hakuna data inapatikana kwa chati.' }}</p>
                     {% endif %}
                 </div>
             </div>
+            <div class="chart-container mb-8">
+                <h2 class="text-xl font-semibold mb-4 text-center text-gray-800">{{ 'Share Answering Yes per Question (%)' if language == 'en' else 'Asilimia Waliojibu Ndiyo kwa Kila Swali' }}</h2>
+                <canvas id="questionChart"></canvas>
+                <div class="overflow-x-auto mt-6">
+                    <table class="table min-w-full bg-white border text-sm">
+                        <thead>
+                            <tr class="bg-gray-100">
+                                <th class="py-2 px-3 border">{{ 'Question' if language == 'en' else 'Swali' }}</th>
+                                <th class="py-2 px-3 border">{{ 'All' if language == 'en' else 'Wote' }}</th>
+                                {% for group, values in question_stats.groups.items() %}
+                                {% for label in values %}
+                                <th class="py-2 px-3 border">{{ label }}</th>
+                                {% endfor %}
+                                {% endfor %}
+                            </tr>
+                        </thead>
+                        <tbody>
+                            {% for question in questions %}
+                            {% set i = loop.index0 %}
+                            <tr class="hover:bg-gray-50">
+                                <td class="py-2 px-3 border" title="{{ question }}">Q{{ i + 1 }}</td>
+                                <td class="py-2 px-3 border">{{ question_stats.prevalence[i] }}%</td>
+                                {% for group, values in question_stats.groups.items() %}
+                                {% for label, stats in values.items() %}
+                                <td class="py-2 px-3 border">{{ stats.prevalence[i] }}%</td>
+                                {% endfor %}
+                                {% endfor %}
+                            </tr>
+                            {% endfor %}
+                        </tbody>
+                    </table>
+                </div>
+            </div>
+            <div class="chart-container mb-8">
+                <h2 class="text-xl font-semibold mb-4 text-center text-gray-800">{{ 'Questions Answered Yes Together (% of Assessments)' if language == 'en' else 'Maswali Yaliyojibiwa Ndiyo Pamoja (% ya Tathmini)' }}</h2>
+                <div class="overflow-x-auto">
+                    <table class="table min-w-full bg-white border text-sm text-center">
+                        <thead>
+                            <tr class="bg-gray-100">
+                                <th class="py-2 px-3 border"></th>
+                                {% for question in questions %}
+                                <th class="py-2 px-3 border" title="{{ question }}">Q{{ loop.index }}</th>
+                                {% endfor %}
+                            </tr>
+                        </thead>
+                        <tbody>
+                            {% for row in question_stats.cooccurrence_share %}
+                            <tr>
+                                <th class="py-2 px-3 border bg-gray-100" title="{{ questions[loop.index0] }}">Q{{ loop.index }}</th>
+                                {% for share in row %}
+                                <td class="py-2 px-3 border" style="background: rgba(244, 63, 94, {{ (share / 100) | round(2) }})">{{ share }}</td>
+                                {% endfor %}
+                            </tr>
+                            {% endfor %}
+                        </tbody>
+                    </table>
+                </div>
+            </div>
             <div class="text-center mb-8">
                 <a href="/download_csv" class="form-button">{{ 'Download CSV Report' if language == 'en' else 'Pakua Ripoti ya CSV' }}</a>
+                <p class="text-sm text-gray-600 mt-4">
+                    {{ 'Other formats' if language == 'en' else 'Miundo mingine' }}:
+                    <a href="/download_parquet" class="underline hover:text-blue-600">Parquet</a> ·
+                    <a href="/download_arrow" class="underline hover:text-blue-600">Arrow</a> ·
+                    <a href="/download_ndjson" class="underline hover:text-blue-600">NDJSON</a>
+                </p>
             </div>
             <div class="overflow-x-auto">
                 <table class="table min-w-full bg-white border text-sm">
@@ -472,7 +1768,7 @@ ADMIN_TEMPLATE = """
                             <td class="py-3 px-4 border">{{ assessment[1] }}</td>
                             <td class="py-3 px-4 border">{{ assessment[2] }}</td>
                             <td class="py-3 px-4 border">{{ assessment[3] }}</td>
-                            <td class="py-3 px-4 border">{{ assessment[4] }}</td>
+                            <td class="py-3 px-4 border">{{ assessment[4] | tojson }}</td>
                             <td class="py-3 px-4 border">{{ assessment[5] }}</td>
                             <td class="py-3 px-4 border">{{ assessment[6] }}</td>
                             <td class="py-3 px-4 border">{{ assessment[7] }}</td>
@@ -483,12 +1779,27 @@ ADMIN_TEMPLATE = """
                     </tbody>
                 </table>
             </div>
+            <div class="flex flex-wrap justify-between items-center gap-4 mt-4 text-sm">
+                <span class="text-gray-600">{{ 'Total assessments' if language == 'en' else 'Jumla ya tathmini' }}: {{ total }}</span>
+                <div class="flex gap-4">
+                    <a href="{{ url_for('admin_dashboard', limit=limit, **filters) }}" class="underline hover:text-blue-600">{{ 'Newest' if language == 'en' else 'Mpya zaidi' }}</a>
+                    {% if prev_before %}
+                    <a href="{{ url_for('admin_dashboard', before=prev_before, limit=limit, **filters) }}" class="underline hover:text-blue-600">{{ 'Newer' if language == 'en' else 'Mpya' }}</a>
+                    {% endif %}
+                    {% if next_after %}
+                    <a href="{{ url_for('admin_dashboard', after=next_after, limit=limit, **filters) }}" class="underline hover:text-blue-600">{{ 'Older' if language == 'en' else 'Za zamani' }}</a>
+                    {% endif %}
+                </div>
+            </div>
         </div>
     </div>
 </main>
+<script src="{{ asset_url('chart.js') }}"></script>
 <script>
     const ageGenderData = {{ age_gender_data | tojson }};
     const riskData = {{ risk_data | tojson }};
+    const questionStats = {{ question_stats | tojson }};
+    const trends = {{ trends | tojson }};
 
     const ageGenderCtx = document.getElementById('ageGenderChart').getContext('2d');
     new Chart(ageGenderCtx, {
@@ -565,10 +1876,336 @@ ADMIN_TEMPLATE = """
             }
         }
     });
+
+    new Chart(document.getElementById('dailyTrendChart').getContext('2d'), {
+        type: 'line',
+        data: {
+            labels: trends.daily.labels,
+            datasets: [
+                { label: 'English', data: trends.daily.en, borderColor: 'rgba(29, 78, 216, 1)', backgroundColor: 'rgba(29, 78, 216, 0.2)', tension: 0.2 },
+                { label: 'Kiswahili', data: trends.daily.sw, borderColor: 'rgba(244, 63, 94, 1)', backgroundColor: 'rgba(244, 63, 94, 0.2)', tension: 0.2 }
+            ]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            scales: { y: { beginAtZero: true, ticks: { precision: 0 } } },
+            plugins: { legend: { display: true, position: 'top', labels: { font: { size: 12 }, padding: 15 } } }
+        }
+    });
+
+    new Chart(document.getElementById('weeklyTrendChart').getContext('2d'), {
+        type: 'line',
+        data: {
+            labels: trends.weekly.labels,
+            datasets: [
+                { label: '{{ 'GBV Risk' if language == 'en' else 'Hatari ya GBV' }}', data: trends.weekly.risk_rate, borderColor: 'rgba(244, 63, 94, 1)', backgroundColor: 'rgba(244, 63, 94, 0.2)', tension: 0.2 },
+                { label: '{{ 'Accepted Support' if language == 'en' else 'Walikubali Msaada' }}', data: trends.weekly.support_rate, borderColor: 'rgba(74, 222, 128, 1)', backgroundColor: 'rgba(74, 222, 128, 0.2)', tension: 0.2 }
+            ]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            scales: { y: { beginAtZero: true, max: 100 } },
+            plugins: { legend: { display: true, position: 'top', labels: { font: { size: 12 }, padding: 15 } } }
+        }
+    });
+
+    const questionCtx = document.getElementById('questionChart').getContext('2d');
+    new Chart(questionCtx, {
+        type: 'bar',
+        data: {
+            labels: questionStats.prevalence.map((_, i) => 'Q' + (i + 1)),
+            datasets: [
+                {
+                    label: '{{ 'All' if language == 'en' else 'Wote' }}',
+                    data: questionStats.prevalence,
+                    backgroundColor: 'rgba(29, 78, 216, 0.6)',
+                    borderColor: 'rgba(29, 78, 216, 1)',
+                    borderWidth: 1
+                },
+                {
+                    label: '{{ 'Male' if language == 'en' else 'Mwanaume' }}',
+                    data: questionStats.groups.gender.Male.prevalence,
+                    backgroundColor: 'rgba(59, 130, 246, 0.4)',
+                    borderColor: 'rgba(59, 130, 246, 1)',
+                    borderWidth: 1
+                },
+                {
+                    label: '{{ 'Female' if language == 'en' else 'Mwanamke' }}',
+                    data: questionStats.groups.gender.Female.prevalence,
+                    backgroundColor: 'rgba(244, 63, 94, 0.6)',
+                    borderColor: 'rgba(244, 63, 94, 1)',
+                    borderWidth: 1
+                }
+            ]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            scales: {
+                y: { beginAtZero: true, max: 100, ticks: { font: { size: 12 } } },
+                x: { ticks: { font: { size: 12 } } }
+            },
+            plugins: {
+                legend: { display: true, position: 'top', labels: { font: { size: 12 }, padding: 15 } }
+            }
+        }
+    });
+</script>
+{{ footer | safe }}
+"""
+
+# Consent, age/gender and all ten questions on one page, checked in the
+# browser with HTML constraints and submitted in a single POST.
+QUICK_FORM_TEMPLATE = """
+{{ navbar | safe }}
+<main class="flex-grow">
+    <div class="container p-6">
+        <div class="card p-8 max-w-4xl mx-auto">
+            <h1 class="text-3xl font-bold mb-6 text-center text-gray-800">{{ 'GBV Risk Assessment Form' if language == 'en' else 'Fomu ya Tathmini ya Hatari ya GBV' }}</h1>
+            <form method="POST" action="/assessment/quick" class="space-y-6">
+                {% if error %}
+                <p class="text-red-500 text-sm text-center">{{ error }}</p>
+                {% endif %}
+                <div>
+                    <p class="text-base text-gray-600 mb-4">
+                        {{
+                            'By proceeding with this assessment, you agree to answer the questions honestly and understand that this tool is designed to help identify potential GBV risks. Your responses are anonymous and will be used to provide tailored support options. This service does not replace professional healthcare advice.'
+                            if language == 'en' else
+                            'Kwa kuendelea na tathmini hii, unakubali kujibu maswali kwa uaminifu na kuelewa kuwa zana hii imeundwa kusaidia kubainisha hatari zinazowezekana za GBV. Majibu yako ni ya siri na yatatumika kutoa chaguzi za msaada zinazolengwa. Huduma hii haichukui nafasi ya ushauri wa kitaalamu wa afya.'
+                        }}
+                    </p>
+                    <label class="radio-label">
+                        <input type="checkbox" name="agree" value="yes" required class="mr-2" {{ 'checked' if agreed else '' }}>
+                        <span>{{ 'I Agree' if language == 'en' else 'Nakubali' }}</span>
+                    </label>
+                </div>
+                <div>
+                    <label for="age" class="block text-lg font-medium text-gray-700 mb-2">{{ 'Age' if language == 'en' else 'Umri' }}</label>
+                    <input type="number" name="age" id="age" value="{{ age }}" min="13" max="35" class="form-input" required
+                           data-message="{{ 'Only participants aged 13 to 35 are allowed.' if language == 'en' else 'Ni washiriki wa miaka 13 hadi 35 tu wanaoruhusiwa.' }}">
+                </div>
+                <div>
+                    <label for="gender" class="block text-lg font-medium text-gray-700 mb-2">{{ 'Gender' if language == 'en' else 'Jinsia' }}</label>
+                    <select name="gender" id="gender" class="form-input" required>
+                        <option value="" {{ 'selected' if not gender else '' }}>{{ 'Select Gender' if language == 'en' else 'Chagua Jinsia' }}</option>
+                        <option value="Male" {{ 'selected' if gender == 'Male' else '' }}>{{ 'Male' if language == 'en' else 'Mwanaume' }}</option>
+                        <option value="Female" {{ 'selected' if gender == 'Female' else '' }}>{{ 'Female' if language == 'en' else 'Mwanamke' }}</option>
+                    </select>
+                </div>
+                {% for i, question in questions %}
+                <div class="border-b border-gray-200 pb-6">
+                    <p class="font-medium text-lg text-gray-800">{{ i + 1 }}. {{ question }}</p>
+                    <div class="radio-group mt-3">
+                        <label class="radio-label">
+                            <input type="radio" name="q{{ i }}" value="yes" required class="mr-2" {{ 'checked' if responses[i] == 'yes' else '' }}>
+                            <span>{{ 'Yes' if language == 'en' else 'Ndiyo' }}</span>
+                        </label>
+                        <label class="radio-label">
+                            <input type="radio" name="q{{ i }}" value="no" required class="mr-2" {{ 'checked' if responses[i] == 'no' else '' }}>
+                            <span>{{ 'No' if language == 'en' else 'Hapana' }}</span>
+                        </label>
+                    </div>
+                </div>
+                {% endfor %}
+                <input type="hidden" name="current_language" value="{{ language }}">
+                <div class="text-center">
+                    <button type="submit" class="form-button">{{ 'Submit' if language == 'en' else 'Wasilisha' }}</button>
+                </div>
+            </form>
+        </div>
+    </div>
+</main>
+<script>
+    var age = document.getElementById('age');
+    age.addEventListener('input', function () {
+        age.setCustomValidity(age.validity.rangeUnderflow || age.validity.rangeOverflow ? age.dataset.message : '');
+    });
 </script>
 {{ footer | safe }}
 """
 
+# The service worker precaches the quick form for both languages (which
+# carries the questions) and the stylesheet. A quick-form POST that fails for
+# lack of a network is stored in IndexedDB and answered with a local page;
+# stored submissions are sent to /assessment/sync in batches when the
+# connection returns, and removed once the server has acknowledged them.
+SERVICE_WORKER_TEMPLATE = """
+const CACHE = 'gbv-{{ version }}';
+const SHELL = {{ shell | tojson }};
+const QUESTION_COUNT = {{ question_count }};
+const SYNC_URL = '/assessment/sync';
+const SYNC_BATCH = {{ batch_size }};
+const MESSAGES = {{ messages | tojson }};
+const STORE = 'submissions';
+
+self.addEventListener('install', event => {
+    event.waitUntil(caches.open(CACHE).then(cache => cache.addAll(SHELL)).then(() => self.skipWaiting()));
+});
+
+self.addEventListener('activate', event => {
+    event.waitUntil(
+        caches.keys()
+            .then(keys => Promise.all(keys.filter(key => key.startsWith('gbv-') && key !== CACHE).map(key => caches.delete(key))))
+            .then(() => self.clients.claim())
+    );
+});
+
+function openDb() {
+    return new Promise((resolve, reject) => {
+        const request = indexedDB.open('gbv-offline', 1);
+        request.onupgradeneeded = () => request.result.createObjectStore(STORE, { keyPath: 'client_id' });
+        request.onsuccess = () => resolve(request.result);
+        request.onerror = () => reject(request.error);
+    });
+}
+
+function withStore(mode, action) {
+    return openDb().then(db => new Promise((resolve, reject) => {
+        const tx = db.transaction(STORE, mode);
+        const request = action(tx.objectStore(STORE));
+        tx.oncomplete = () => resolve(request && request.result);
+        tx.onerror = tx.onabort = () => reject(tx.error);
+    }));
+}
+
+function offlinePage(item) {
+    const text = MESSAGES[item.language] || MESSAGES.en;
+    const atRisk = item.responses.includes('yes');
+    return `<!DOCTYPE html>
+<html lang="${item.language}"><head><meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>GBV Helper</title><link rel="stylesheet" href="${SHELL[0]}"></head>
+<body class="bg-gray-100 flex flex-col min-h-screen"><main class="flex-grow"><div class="container p-6">
+<div class="card p-8 max-w-4xl mx-auto text-center">
+<h1 class="text-3xl font-bold mb-6 text-gray-800">${text.title}</h1>
+<p class="text-xl mb-6 ${atRisk ? 'text-red-600' : 'text-green-600'}">${atRisk ? text.risk : text.no_risk}</p>
+<p class="text-base text-gray-600 mb-6">${text.saved}</p>
+<a href="/assessment/quick?lang=${item.language}" class="form-button">${text.again}</a>
+</div></div></main></body></html>`;
+}
+
+function queueSubmission(form) {
+    const responses = [];
+    for (let i = 0; i < QUESTION_COUNT; i++) {
+        responses.push(form.get('q' + i));
+    }
+    const item = {
+        client_id: self.crypto.randomUUID(),
+        agree: form.get('agree'),
+        age: form.get('age'),
+        gender: form.get('gender'),
+        language: form.get('current_language') || 'en',
+        responses: responses,
+        timestamp: new Date().toISOString(),
+    };
+    return withStore('readwrite', store => store.put(item))
+        .then(() => self.registration.sync && self.registration.sync.register('gbv-sync').catch(() => null))
+        .then(() => new Response(offlinePage(item), { headers: { 'Content-Type': 'text/html; charset=utf-8' } }));
+}
+
+function drain() {
+    return withStore('readonly', store => store.getAll()).then(items => {
+        if (!items.length) {
+            return;
+        }
+        return fetch(SYNC_URL, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ assessments: items.slice(0, SYNC_BATCH) }),
+        })
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error('sync failed with status ' + response.status);
+                }
+                return response.json();
+            })
+            .then(body => withStore('readwrite', store => {
+                body.results.forEach(result => {
+                    if (result.client_id) {
+                        store.delete(result.client_id);
+                    }
+                });
+            }))
+            .then(() => items.length > SYNC_BATCH ? drain() : undefined);
+    });
+}
+
+let syncing = null;
+
+function flush() {
+    if (!syncing) {
+        syncing = drain().finally(() => { syncing = null; });
+    }
+    return syncing;
+}
+
+self.addEventListener('sync', event => {
+    if (event.tag === 'gbv-sync') {
+        event.waitUntil(flush());
+    }
+});
+
+self.addEventListener('message', event => {
+    if (event.data === 'sync') {
+        event.waitUntil(flush().catch(() => null));
+    }
+});
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    const url = new URL(request.url);
+    if (url.origin !== self.location.origin) {
+        return;
+    }
+    if (request.method === 'POST' && url.pathname === '/assessment/quick') {
+        const copy = request.clone();
+        event.respondWith(fetch(request).catch(() => copy.formData().then(queueSubmission)));
+    } else if (request.method === 'GET' && url.pathname.startsWith('/static/dist/')) {
+        event.respondWith(caches.match(request).then(hit => hit || fetch(request)));
+    } else if (request.method === 'GET' && url.pathname === '/assessment/quick') {
+        const shell = '/assessment/quick?lang=' + (url.searchParams.get('lang') === 'sw' ? 'sw' : 'en');
+        event.respondWith(fetch(request).catch(() => caches.match(shell)));
+    }
+});
+"""
+
+RESULT_TEMPLATE = """
+{{ navbar | safe }}
+<main class="flex-grow">
+    <div class="container p-6">
+        <div class="card p-8 max-w-4xl mx-auto">
+            <h1 class="text-3xl font-bold mb-6 text-center text-gray-800">{{ 'Assessment Result' if language == 'en' else 'Matokeo ya Tathmini' }}</h1>
+            <p class="text-xl mb-6 text-center {{ 'text-red-600' if risk else 'text-green-600' }}">{{ level }}</p>
+            <div class="mb-8 text-center">
+                <p class="font-medium text-lg text-gray-800">{{ 'Do you agree to get legal and support organizations for GBV support?' if language == 'en' else 'Je, unakubali kupata mashirika ya kisheria na msaada kwa msaada wa GBV?' }}</p>
+                <div class="mt-4 flex flex-wrap justify-center gap-4">
+                    <a href="/update_support/yes/{{ language }}" class="form-button bg-green-600 hover:bg-green-700">{{ ' Agree to Support' if language == 'en' else 'Kubali Msaada' }}</a>
+                    <a href="/update_support/no/{{ language }}" class="form-button bg-red-600 hover:bg-red-700">{{ 'Do Not Agree to Support' if language == 'en' else 'Sikubali Msaada' }}</a>
+                </div>
+            </div>
+            {% if support == 'yes' %}
+            <div class="mb-8">
+                <p class="font-medium text-lg text-gray-800">{{ 'Support Options' if language == 'en' else 'Chaguzi za Msaada' }}</p>
+                <ul class="list-disc pl-6 text-base text-gray-600 space-y-3 mt-3">
+                    <li><a href="/support/{{ language }}" class="underline hover:text-blue-600 transition-colors">{{ 'Legal Support for GBV Survivors' if language == 'en' else 'Msaada wa Kisheria kwa Waathirika wa GBV' }}</a></li>
+                    <li><a href="/support/{{ language }}" class="underline hover:text-blue-600 transition-colors">{{ 'Counselling Support for GBV Survivors' if language == 'en' else 'Msaada wa Ushauri Nasaha kwa Waathirika wa GBV' }}</a></li>
+                </ul>
+            </div>
+            {% endif %}
+            <p class="mb-6 text-base text-gray-600 text-center">{{ 'Chat with our chatbot to learn more about GBV anonymously at right side bottom 💬.' if language == 'en' else 'Ongea na chatbot yetu kujifunza zaidi kuhusu GBV bila kujulikana upande wa kulia chini💬.' }}</p>
+            <div class="text-center">
+                <a href="/assessment" class="form-button">{{ 'Start Over' if language == 'en' else 'Anza Tena' }}</a>
+            </div>
+        </div>
+    </div>
+    <script src="https://cdn.botpress.cloud/webchat/v3.0/inject.js"></script>
+    <script src="https://files.bpcontent.cloud/2025/06/01/14/20250601145948-QV2AEO5Z.js"></script>
+</main>
+{{ footer | safe }}
+"""
+
 SUPPORT_TEMPLATE = """
 {{ navbar | safe }}
 <main class="flex-grow">
@@ -601,6 +2238,165 @@ SUPPORT_TEMPLATE = """
 {{ footer | safe }}
 """
 
+ADMIN_LOGIN_TEMPLATE = """
+{{ navbar | safe }}
+<main class="flex-grow">
+    <div class="container p-6">
+        <div class="card p-8 max-w-md mx-auto">
+            <h1 class="text-3xl font-bold mb-6 text-center text-gray-800">{{ 'Admin Login' if language == 'en' else 'Ingia kama Msimamizi' }}</h1>
+            {% if error %}
+            <p class="text-red-500 mb-6 text-base text-center">{{ 'Invalid password' if language == 'en' else 'Nenosiri si Sahihi' }}</p>
+            {% endif %}
+            <form method="POST" class="space-y-6">
+                <div>
+                    <label for="password" class="block text-lg font-medium text-gray-700 mb-2">{{ 'Password' if language == 'en' else 'Nenosiri' }}:</label>
+                    <input type="password" name="password" id="password" class="form-input" required aria-describedby="password-error">
+                </div>
+                <div class="text-center">
+                    <button type="submit" class="form-button">{{ 'Login' if language == 'en' else 'Ingia' }}</button>
+                </div>
+            </form>
+        </div>
+    </div>
+</main>
+{{ footer | safe }}
+"""
+
+# build_assets.py writes CSS and Chart.js to static/dist under content-hashed names.
+STATIC_DIR = os.path.join(app.root_path, 'static')
+IMMUTABLE_MAX_AGE = 31536000
+
+def load_asset_manifest():
+    try:
+        with open(os.path.join(STATIC_DIR, 'dist', 'manifest.json')) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        app.logger.warning("static/dist/manifest.json is missing; run build_assets.py")
+        return {}
+
+ASSET_MANIFEST = load_asset_manifest()
+
+def asset_url(name):
+    return f"/static/dist/{ASSET_MANIFEST.get(name, name)}"
+
+app.jinja_env.globals['asset_url'] = asset_url
+
+# Page templates are compiled once at import. The navbar and footer only depend
+# on the language (and, for the navbar, the path used by the language switcher),
+# so they are rendered once per combination up front.
+NAVBAR_PATHS = ['/about', '/assessment', '/assessment/quick', '/support/en', '/support/sw', '/admin-login', '/admin']
+
+TEMPLATES = {}
+NAVBARS = {}
+FOOTERS = {}
+
+def compile_templates():
+    sources = {
+        'navbar': NAVBAR_TEMPLATE,
+        'footer': FOOTER_TEMPLATE,
+        'about': ABOUT_TEMPLATE,
+        'form': FORM_TEMPLATE,
+        'quick_form': QUICK_FORM_TEMPLATE,
+        'result': RESULT_TEMPLATE,
+        'support': SUPPORT_TEMPLATE,
+        'admin_login': ADMIN_LOGIN_TEMPLATE,
+        'admin': ADMIN_TEMPLATE,
+        'service_worker': SERVICE_WORKER_TEMPLATE,
+    }
+    for name, source in sources.items():
+        TEMPLATES[name] = app.jinja_env.from_string(source)
+    for language in QUESTIONS:
+        FOOTERS[language] = TEMPLATES['footer'].render(language=language)
+        for path in NAVBAR_PATHS:
+            NAVBARS[(language, path)] = TEMPLATES['navbar'].render(language=language, request_path=path)
+
+compile_templates()
+
+def get_navbar(language, path):
+    navbar = NAVBARS.get((language, path))
+    if navbar is None:
+        navbar = TEMPLATES['navbar'].render(language=language, request_path=path)
+    return navbar
+
+def get_footer(language):
+    footer = FOOTERS.get(language)
+    if footer is None:
+        footer = TEMPLATES['footer'].render(language=language)
+    return footer
+
+def render_page(name, language, path=None, **context):
+    navbar = get_navbar(language, path or request.path)
+    with metrics.RENDER_LATENCY.labels(name).time():
+        return render_template(TEMPLATES[name], language=language, navbar=navbar, footer=get_footer(language), **context)
+
+# Fully rendered pages that only depend on the language are kept as bytes with
+# a strong ETag and precompressed variants, keyed by (endpoint, language).
+PAGE_CACHE = {}
+
+def build_page_entry(body):
+    etag = hashlib.sha256(body).hexdigest()[:32]
+    entry = {'identity': (body, etag)}
+    entry['gzip'] = (gzip.compress(body, 9, mtime=0), etag + '-gz')
+    if brotli is not None:
+        entry['br'] = (brotli.compress(body), etag + '-br')
+    return entry
+
+def preferred_encoding(variants):
+    for candidate in ('br', 'gzip'):
+        if candidate in variants and request.accept_encodings[candidate] > 0:
+            return candidate
+    return 'identity'
+
+def cached_page(key, render, mimetype='text/html'):
+    entry = PAGE_CACHE.get(key)
+    if entry is None:
+        entry = build_page_entry(render().encode('utf-8'))
+        PAGE_CACHE[key] = entry
+
+    encoding = preferred_encoding(entry)
+    body, etag = entry[encoding]
+
+    if any(request.if_none_match.contains(tag) for _, tag in entry.values()):
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(body, mimetype=mimetype)
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Accept-Encoding')
+    return response
+
+def database_error(e):
+    metrics.record_error('database', e)
+    app.logger.error("Database error: %s", e)
+    return "Database error occurred.", 500
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+# Latency is recorded when the response is closed, so streamed exports are
+# timed until their last chunk has been sent.
+@app.after_request
+def record_request(response):
+    endpoint = request.endpoint or 'unmatched'
+    method = request.method
+    start = g.get('request_start', time.perf_counter())
+    metrics.REQUESTS.labels(endpoint, method, str(response.status_code)).inc()
+    response.call_on_close(lambda: metrics.REQUEST_LATENCY.labels(endpoint, method).observe(time.perf_counter() - start))
+    return response
+
+def record_exception(sender, exception, **extra):
+    metrics.record_error('unhandled', exception)
+
+got_request_exception.connect(record_exception, app)
+
+@app.route("/metrics")
+def metrics_view():
+    body, content_type = metrics.exposition()
+    return app.response_class(body, content_type=content_type)
+
 @app.route("/set_language", methods=["POST"])
 def set_language():
     language = request.form.get('language', 'en')
@@ -609,12 +2405,45 @@ def set_language():
     redirect_url = request.form.get('redirect_url', url_for('index'))
     return redirect(redirect_url)
 
+# Stat results, ETags and the precompressed .br/.gz siblings of each static
+# file are looked up once per process instead of on every request.
+STATIC_FILES = {}
+
+def static_entry(filename):
+    entry = STATIC_FILES.get(filename)
+    if entry is None:
+        path = safe_join(STATIC_DIR, filename)
+        if path is None or not os.path.isfile(path):
+            return None
+        entry = {'mimetype': mimetypes.guess_type(filename)[0] or 'application/octet-stream'}
+        for encoding, suffix in (('identity', ''), ('br', '.br'), ('gzip', '.gz')):
+            if encoding == 'identity' or os.path.isfile(path + suffix):
+                stat = os.stat(path + suffix)
+                entry[encoding] = (path + suffix, f"{stat.st_mtime_ns:x}-{stat.st_size:x}")
+        if not app.debug:
+            STATIC_FILES[filename] = entry
+    return entry
+
 @app.route("/static/<path:filename>")
 def static_files(filename):
-    static_dir = os.path.join(app.root_path, 'static')
-    if not os.path.exists(os.path.join(static_dir, filename)):
-        print(f"Error: File not found - static/{filename}")
-    return send_from_directory(static_dir, filename)
+    entry = static_entry(filename)
+    if entry is None:
+        abort(404)
+    encoding = preferred_encoding(entry)
+    path, etag = entry[encoding]
+    immutable = filename.startswith('dist/')
+    response = send_file(
+        path, mimetype=entry['mimetype'], etag=etag, conditional=True,
+        max_age=IMMUTABLE_MAX_AGE if immutable else None
+    )
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    if 'br' in entry or 'gzip' in entry:
+        response.vary.add('Accept-Encoding')
+    if immutable:
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+    return response
 
 @app.route("/", methods=["GET", "POST"])
 def index():
@@ -630,9 +2459,6 @@ def assessment():
     age = ""
     agreed = session.get('agreed', False)
 
-    navbar = render_template_string(NAVBAR_TEMPLATE, language=language, request_path=request.path)
-    footer = render_template_string(FOOTER_TEMPLATE, language=language)
-
     if request.method == "POST":
         if 'agree' in request.form:
             session['agreed'] = True
@@ -640,106 +2466,186 @@ def assessment():
         elif 'submit_initial' in request.form and agreed:
             age = request.form.get("age", "").strip()
             gender = request.form.get("gender", "").strip()
-
-            if not age or not age.isdigit():
-                error = "Please enter a valid age." if language == 'en' else "Tafadhali weka umri sahihi."
-            elif not gender:
-                error = "Please select your gender." if language == 'en' else "Tafadhali chagua jinsia yako."
-            else:
-                try:
-                    age = int(age)
-                    if age < 13 or age > 35:
-                        error = "Only participants aged 13 to 35 are allowed." if language == 'en' else "Ni washiriki wa miaka 13 hadi 35 tu wanaoruhusiwa."
-                    else:
-                        show_questions = True
-                        session['age'] = age
-                        session['gender'] = gender
-                        session['language'] = language
-                except ValueError:
-                    error = "Invalid age format." if language == 'en' else "Umri si wa sahihi."
+            valid_age, error = validate_profile(age, gender, language)
+            if error is None:
+                age = valid_age
+                show_questions = True
+                session['age'] = age
+                session['gender'] = gender
+                session['language'] = language
         elif 'submit_questions' in request.form and agreed:
             language = request.form.get('current_language', 'en')
             questions = QUESTIONS.get(language, QUESTIONS['en'])
             responses = [request.form.get(f'q{i}', 'no') for i in range(len(questions))]
-            yes_count = sum(1 for r in responses if r == 'yes')
-            no_count = sum(1 for r in responses if r == 'no')
-
-            if yes_count + no_count != 10:
-                error = "Please answer all 10 questions." if language == 'en' else "Tafadhali jibu maswali yote 10."
-            else:
-                if yes_count >= 1:
-                    level = "GBV Risk" if language == 'en' else "Hatari ya GBV"
-                else:
-                    level = "No Risk" if language == 'en' else "Hakuna Hatari"
-
-                try:
-                    with sqlite3.connect('gbv_assessments.db') as conn:
-                        cursor = conn.cursor()
-                        cursor.execute('''
-                            INSERT INTO assessments (age, gender, language, responses, yes_count, no_count, level, support, timestamp)
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        ''', (session.get('age'), session.get('gender'), language, json.dumps(responses), yes_count, no_count, level, None, datetime.now()))
-                        conn.commit()
-                        assessment_id = cursor.lastrowid
-                except sqlite3.Error as e:
-                    print(f"Database error: {e}")
-                    return "Database error occurred.", 500
-
-                session['assessment_id'] = assessment_id
-                session['support'] = None
+            row, error = assessment_row(session.get('age'), session.get('gender'), language, responses)
+            if error is None:
+                response = submit_assessment(row, language)
                 session['agreed'] = False  # Reset agreement after submission
+                return response
 
-                result_template = """
-                {{ navbar | safe }}
-                <main class="flex-grow">
-                    <div class="container p-6">
-                        <div class="card p-8 max-w-4xl mx-auto">
-                            <h1 class="text-3xl font-bold mb-6 text-center text-gray-800">{{ 'Assessment Result' if language == 'en' else 'Matokeo ya Tathmini' }}</h1>
-                            <p class="text-xl mb-6 text-center {{ 'text-red-600' if level in ['GBV Risk', 'Hatari ya GBV'] else 'text-green-600' }}">{{ level }}</p>
-                            <div class="mb-8 text-center">
-                                <p class="font-medium text-lg text-gray-800">{{ 'Do you agree to get legal and support organizations for GBV support?' if language == 'en' else 'Je, unakubali kupata mashirika ya kisheria na msaada kwa msaada wa GBV?' }}</p>
-                                <div class="mt-4 flex flex-wrap justify-center gap-4">
-                                    <a href="/update_support/yes/{{ language }}" class="form-button bg-green-600 hover:bg-green-700">{{ ' Agree to Support' if language == 'en' else 'Kubali Msaada' }}</a>
-                                    <a href="/update_support/no/{{ language }}" class="form-button bg-red-600 hover:bg-red-700">{{ 'Do Not Agree to Support' if language == 'en' else 'Sikubali Msaada' }}</a>
-                                </div>
-                            </div>
-                            {% if support == 'yes' %}
-                            <div class="mb-8">
-                                <p class="font-medium text-lg text-gray-800">{{ 'Support Options' if language == 'en' else 'Chaguzi za Msaada' }}</p>
-                                <ul class="list-disc pl-6 text-base text-gray-600 space-y-3 mt-3">
-                                    <li><a href="/support/{{ language }}" class="underline hover:text-blue-600 transition-colors">{{ 'Legal Support for GBV Survivors' if language == 'en' else 'Msaada wa Kisheria kwa Waathirika wa GBV' }}</a></li>
-                                    <li><a href="/support/{{ language }}" class="underline hover:text-blue-600 transition-colors">{{ 'Counselling Support for GBV Survivors' if language == 'en' else 'Msaada wa Ushauri Nasaha kwa Waathirika wa GBV' }}</a></li>
-                                </ul>
-                            </div>
-                            {% endif %}
-                            <p class="mb-6 text-base text-gray-600 text-center">{{ 'Chat with our chatbot to learn more about GBV anonymously at right side bottom 💬.' if language == 'en' else 'Ongea na chatbot yetu kujifunza zaidi kuhusu GBV bila kujulikana upande wa kulia chini💬.' }}</p>
-                            <div class="text-center">
-                                <a href="/assessment" class="form-button">{{ 'Start Over' if language == 'en' else 'Anza Tena' }}</a>
-                            </div>
-                        </div>
-                    </div>
-                    <script src="https://cdn.botpress.cloud/webchat/v3.0/inject.js"></script>
-                    <script src="https://files.bpcontent.cloud/2025/06/01/14/20250601145948-QV2AEO5Z.js"></script>
-                </main>
-                {{ footer | safe }}
-                """
-                return render_template_string(result_template, language=language, level=level, navbar=navbar, footer=footer, support=session.get('support'))
+    return render_page('form', language, questions=enumerate(questions), show_questions=show_questions, age=age, gender=gender, error=error, agreed=agreed)
+
+def submit_assessment(row, language):
+    try:
+        assessment_id = save_assessment(row)
+    except (sqlite3.Error, TimeoutError) as e:
+        return database_error(e)
+
+    session['assessment_id'] = assessment_id
+    session['support'] = None
+    return render_page('result', language, level=level_label(row[7], language), risk=row[7], support=None)
+
+@app.route("/assessment/quick", methods=["GET", "POST"])
+def quick_assessment():
+    language = request.form.get('current_language') or request.args.get('lang') or session.get('language', 'en')
+    if language not in QUESTIONS:
+        language = 'en'
+    if request.method == "GET":
+        return cached_page(('quick_form', language), lambda: render_page(
+            'quick_form', language, questions=enumerate(QUESTIONS[language]), responses=[None] * QUESTION_COUNT,
+            age='', gender='', agreed=False, error=None
+        ))
+
+    questions = QUESTIONS[language]
+    agreed = request.form.get('agree') == 'yes'
+    age = request.form.get('age', '').strip()
+    gender = request.form.get('gender', '').strip()
+    responses = [request.form.get(f'q{i}') for i in range(len(questions))]
+
+    if not agreed:
+        error = consent_error(language)
+    else:
+        valid_age, error = validate_profile(age, gender, language)
+        if error is None:
+            row, error = assessment_row(valid_age, gender, language, responses)
+            if error is None:
+                return submit_assessment(row, language)
+
+    return render_page(
+        'quick_form', language, questions=enumerate(questions), responses=responses,
+        age=age, gender=gender, agreed=agreed, error=error
+    )
 
-    return render_template_string(FORM_TEMPLATE, language=language, questions=enumerate(questions), show_questions=show_questions, age=age, gender=gender, error=error, navbar=navbar, footer=footer, agreed=agreed)
+@app.route("/assessment/sync", methods=["POST"])
+def sync_assessments():
+    payload = request.get_json(silent=True)
+    records = payload.get('assessments') if isinstance(payload, dict) else None
+    if not isinstance(records, list):
+        return jsonify(error="Expected a JSON object with an 'assessments' list."), 400
+    if len(records) > SYNC_MAX_BATCH:
+        return jsonify(error=f"At most {SYNC_MAX_BATCH} assessments per request."), 413
+
+    try:
+        results = ingest_records(records, record_row, require_client_id=True)
+    except sqlite3.Error as e:
+        return database_error(e)
+    return jsonify(results=results)
+
+def ingest_authorized():
+    header = request.headers.get('Authorization', '')
+    if not header.startswith('Bearer '):
+        return False
+    token = header[len('Bearer '):].strip().encode('utf-8')
+    allowed_tokens = app.config['INGEST_TOKENS']
+    if isinstance(allowed_tokens, str):
+        allowed_tokens = [allowed_tokens]
+    return bool(token) and any(
+        hmac.compare_digest(token, allowed.encode('utf-8')) for allowed in allowed_tokens if allowed
+    )
+
+def parse_ingest_body(body, mimetype):
+    text = body.decode('utf-8')
+    if mimetype == 'application/json' or (mimetype != 'application/x-ndjson' and text.lstrip().startswith('[')):
+        records = json.loads(text)
+        if not isinstance(records, list):
+            raise ValueError("Expected a JSON array of assessments.")
+        return records
+    records = []
+    for number, line in enumerate(text.splitlines(), 1):
+        if line.strip():
+            try:
+                records.append(json.loads(line))
+            except ValueError as e:
+                raise ValueError(f"Line {number}: {e}")
+    return records
+
+@app.route("/api/assessments/ingest", methods=["POST"])
+def ingest_assessments():
+    if not ingest_authorized():
+        return jsonify(error="Unauthorized"), 401
+
+    # Bodies over the cap are refused before they are read into memory. A
+    # chunked body is only cut off at the limit, so one byte more is allowed
+    # to tell it apart from one that fits.
+    max_bytes = app.config['INGEST_MAX_BYTES']
+    request.max_content_length = max_bytes + 1
+    try:
+        body = request.get_data()
+    except RequestEntityTooLarge:
+        body = None
+    if body is None or len(body) > max_bytes:
+        return jsonify(error=f"At most {max_bytes} bytes per request."), 413
+    try:
+        records = parse_ingest_body(body, request.mimetype)
+    except ValueError as e:
+        return jsonify(error=f"Invalid request body: {e}"), 400
+    if len(records) > app.config['INGEST_MAX_RECORDS']:
+        return jsonify(error=f"At most {app.config['INGEST_MAX_RECORDS']} assessments per request."), 413
+
+    try:
+        results = ingest_records(records, ingest_row)
+    except sqlite3.Error as e:
+        return database_error(e)
+    counts = {status: sum(1 for result in results if result['status'] == status) for status in ('stored', 'duplicate', 'invalid')}
+    return jsonify(results=results, **counts)
+
+@app.route("/manifest.webmanifest")
+def web_manifest():
+    return cached_page(('manifest',), lambda: json.dumps({
+        'name': 'GBV Helper',
+        'short_name': 'GBV Helper',
+        'start_url': '/assessment/quick',
+        'scope': '/',
+        'display': 'standalone',
+        'background_color': '#f3f4f6',
+        'theme_color': '#1d4ed8',
+        'icons': [{'src': '/static/icon.svg', 'sizes': 'any', 'type': 'image/svg+xml'}],
+    }), mimetype='application/manifest+json')
+
+@app.route("/sw.js")
+def service_worker():
+    def render():
+        shell = [asset_url('app.css'), '/static/icon.svg'] + [f'/assessment/quick?lang={language}' for language in QUESTIONS]
+        messages = {
+            language: {
+                'title': 'Assessment Result' if language == 'en' else 'Matokeo ya Tathmini',
+                'risk': level_label(1, language),
+                'no_risk': level_label(0, language),
+                'saved': 'You are offline. Your answers are saved on this device and will be sent automatically when you are back online.'
+                    if language == 'en' else
+                    'Huna mtandao. Majibu yako yamehifadhiwa kwenye kifaa hiki na yatatumwa yenyewe mtandao ukirudi.',
+                'again': 'Start Over' if language == 'en' else 'Anza Tena',
+            }
+            for language in QUESTIONS
+        }
+        # The version changes whenever the cached shell or the questions do,
+        # which makes browsers install the new worker and drop the old cache.
+        version = hashlib.sha256(json.dumps([shell, QUESTIONS, messages], sort_keys=True).encode('utf-8')).hexdigest()[:12]
+        return TEMPLATES['service_worker'].render(
+            version=version, shell=shell, question_count=QUESTION_COUNT, batch_size=SYNC_MAX_BATCH, messages=messages
+        )
+    return cached_page(('service_worker',), render, mimetype='text/javascript')
 
 @app.route("/about")
 def about():
     language = session.get('language', 'en')
-    navbar = render_template_string(NAVBAR_TEMPLATE, language=language, request_path=request.path)
-    footer = render_template_string(FOOTER_TEMPLATE, language=language)
-    return render_template_string(ABOUT_TEMPLATE, language=language, navbar=navbar, footer=footer)
+    return cached_page(('about', language), lambda: render_page('about', language, path='/about'))
 
 @app.route("/support/<lang>")
 def support(lang):
     language = lang if lang in ['en', 'sw'] else 'en'
-    navbar = render_template_string(NAVBAR_TEMPLATE, language=language, request_path=request.path)
-    footer = render_template_string(FOOTER_TEMPLATE, language=language)
-    return render_template_string(SUPPORT_TEMPLATE, language=language, navbar=navbar, footer=footer)
+    path = url_for('support', lang=language)
+    return cached_page(('support', language), lambda: render_page('support', language, path=path))
 
 @app.route("/update_support/<support>/<lang>")
 def update_support(support, lang):
@@ -748,14 +2654,15 @@ def update_support(support, lang):
 
     if support in ['yes', 'no'] and assessment_id:
         try:
-            with sqlite3.connect('gbv_assessments.db') as conn:
+            with get_db() as conn:
                 cursor = conn.cursor()
-                cursor.execute('UPDATE assessments SET support = ? WHERE id = ?', (support, assessment_id))
+                cursor.execute(
+                    'UPDATE assessments SET support = ? WHERE id = ?', (code_of(SUPPORT_ANSWERS, support), assessment_id)
+                )
                 conn.commit()
             session['support'] = support
         except sqlite3.Error as e:
-            print(f"Database error: {e}")
-            return "Database error occurred.", 500
+            return database_error(e)
 
     if support == 'yes':
         return redirect(url_for('support', lang=language))
@@ -765,8 +2672,6 @@ def update_support(support, lang):
 @app.route("/admin-login", methods=["GET", "POST"])
 def admin():
     language = session.get('language', 'en')
-    navbar = render_template_string(NAVBAR_TEMPLATE, language=language, request_path=request.path)
-    footer = render_template_string(FOOTER_TEMPLATE, language=language)
 
     if request.method == "POST":
         password = request.form.get("password")
@@ -774,93 +2679,64 @@ def admin():
             session['admin'] = True
             return redirect(url_for('admin_dashboard'))
         else:
-            return render_template_string("""
-            {{ navbar | safe }}
-            <main class="flex-grow">
-                <div class="container p-6">
-                    <div class="card p-8 max-w-md mx-auto">
-                        <h1 class="text-3xl font-bold mb-6 text-center text-gray-800">{{ 'Admin Login' if language == 'en' else 'Ingia kama Msimamizi' }}</h1>
-                        <p class="text-red-500 mb-6 text-base text-center">{{ 'Invalid password' if language == 'en' else 'Nenosiri si Sahihi' }}</p>
-                        <form method="POST" class="space-y-6">
-                            <div>
-                                <label for="password" class="block text-lg font-medium text-gray-700 mb-2">{{ 'Password' if language == 'en' else 'Nenosiri' }}:</label>
-                                <input type="password" name="password" id="password" class="form-input" required aria-describedby="password-error">
-                            </div>
-                            <div class="text-center">
-                                <button type="submit" class="form-button">{{ 'Login' if language == 'en' else 'Ingia' }}</button>
-                            </div>
-                        </form>
-                    </div>
-                </div>
-            </main>
-            {{ footer | safe }}
-            """, navbar=navbar, footer=footer, language=language)
-
-    return render_template_string("""
-    {{ navbar | safe }}
-    <main class="flex-grow">
-        <div class="container p-6">
-            <div class="card p-8 max-w-md mx-auto">
-                <h1 class="text-3xl font-bold mb-6 text-center text-gray-800">{{ 'Admin Login' if language == 'en' else 'Ingia kama Msimamizi' }}</h1>
-                <form method="POST" class="space-y-6">
-                    <div>
-                        <label for="password" class="block text-lg font-medium text-gray-700 mb-2">{{ 'Password' if language == 'en' else 'Nenosiri' }}:</label>
-                        <input type="password" name="password" id="password" class="form-input" required aria-describedby="password-error">
-                    </div>
-                    <div class="text-center">
-                        <button type="submit" class="form-button">{{ 'Login' if language == 'en' else 'Ingia' }}</button>
-                    </div>
-                </form>
-            </div>
-        </div>
-    </main>
-    {{ footer | safe }}
-    """, navbar=navbar, footer=footer, language=language)
+            return render_page('admin_login', language, error=True)
+
+    return render_page('admin_login', language, error=False)
 
 @app.route("/admin", methods=["GET"])
 def admin_dashboard():
     language = session.get('language', 'en')
-    navbar = render_template_string(NAVBAR_TEMPLATE, language=language, request_path=request.path)
-    footer = render_template_string(FOOTER_TEMPLATE, language=language)
 
     if not session.get('admin'):
         return redirect(url_for('admin'))
 
+    import analytics
+
     try:
-        with sqlite3.connect('gbv_assessments.db') as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT * FROM assessments')
-            assessments = cursor.fetchall()
-
-        age_ranges = {'13-18': {'Male': 0, 'Female': 0}, '19-25': {'Male': 0, 'Female': 0}, '26-35': {'Male': 0, 'Female': 0}}
-        risk_count = 0
-        no_risk_count = 0
-
-        for assessment in assessments:
-            age = assessment[1]
-            gender = assessment[2]
-            level = assessment[7]
-            if 13 <= age <= 18:
-                age_ranges['13-18'][gender] += 1
-            elif 19 <= age <= 25:
-                age_ranges['19-25'][gender] += 1
-            elif 26 <= age <= 35:
-                age_ranges['26-35'][gender] += 1
-            if level in ['GBV Risk', 'Hatari ya GBV']:
-                risk_count += 1
+        limit = page_limit()
+        filters = parse_filters(request.args)
+        where, params = filter_sql(filters) if filters else (None, ())
+        with get_snapshot_db() as conn:
+            age_ranges, risk_data, total = dashboard_stats(conn, where, params)
+            if filters:
+                question_stats = analytics.slice_summary(conn, QUESTION_SET_VERSION, QUESTION_GROUPS, where, params)
             else:
-                no_risk_count += 1
+                question_stats = analytics.question_summary(conn, QUESTION_SET_VERSION, QUESTION_GROUPS)
+            trends = trend_series(conn, where=where, params=params)
+            assessments, next_after, prev_before = fetch_assessments_page(
+                conn, request.args.get('after', type=int), request.args.get('before', type=int), limit, filters
+            )
 
-        total = risk_count + no_risk_count
-        risk_data = {
-            'risk': risk_count / total * 100 if total > 0 else 0,
-            'no_risk': no_risk_count / total * 100 if total > 0 else 0
-        }
+        return render_page('admin', language, assessments=assessments, total=total, age_gender_data=age_ranges, risk_data=risk_data,
+                           question_stats=question_stats, trends=trends, questions=QUESTIONS.get(language, QUESTIONS['en']),
+                           limit=limit, next_after=next_after, prev_before=prev_before, filters=filters,
+                           age_ranges=AGE_RANGES, genders=GENDERS, data_as_of=snapshot_time(),
+                           snapshot_max_age=app.config['SNAPSHOT_MAX_AGE'], snapshot_max_rows=app.config['SNAPSHOT_MAX_ROWS'])
+    except sqlite3.Error as e:
+        return database_error(e)
+
+@app.route("/admin/api/assessments")
+def admin_api_assessments():
+    if not session.get('admin'):
+        return jsonify(error='Unauthorized'), 401
 
-        return render_template_string(ADMIN_TEMPLATE, language=language, navbar=navbar, footer=footer, assessments=assessments, age_gender_data=age_ranges, risk_data=risk_data)
+    try:
+        filters = parse_filters(request.args)
+        where, params = filter_sql(filters)
+        with get_snapshot_db() as conn:
+            rows, next_after, prev_before = fetch_assessments_page(
+                conn, request.args.get('after', type=int), request.args.get('before', type=int), page_limit(), filters
+            )
+            if filters:
+                total = conn.execute(f'SELECT COUNT(*) FROM assessments WHERE {where}', params).fetchone()[0]
+            else:
+                total = conn.execute('SELECT COALESCE(SUM(count), 0) FROM assessment_stats').fetchone()[0]
+
+        assessments = [dict(zip(ASSESSMENT_COLUMNS, row)) for row in rows]
+        return jsonify(assessments=assessments, next_after=next_after, prev_before=prev_before, filters=filters, total=total,
+                       data_as_of=snapshot_time().isoformat(' ', 'seconds'))
     except sqlite3.Error as e:
-        print(f"Database error: {e}")
-        return "Database error occurred.", 500
+        return database_error(e)
 
 @app.route("/download_csv")
 def download_csv():
@@ -868,22 +2744,171 @@ def download_csv():
         return redirect(url_for('admin'))
 
     try:
-        with sqlite3.connect('gbv_assessments.db') as conn:
-            df = pd.read_sql_query('SELECT * FROM assessments', conn)
-
-        output = io.StringIO()
-        df.to_csv(output, index=False)
-        output.seek(0)
-
-        return send_file(
-            io.BytesIO(output.getvalue().encode('utf-8')),
-            mimetype='text/csv',
-            as_attachment=True,
-            download_name='gbv_assessments.csv'
+        handle, meta = open_csv_artifact(get_snapshot_db())
+    except sqlite3.Error as e:
+        return database_error(e)
+
+    def generate(remaining):
+        while remaining > 0:
+            chunk = handle.read(min(remaining, 1 << 16))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+    response = app.response_class(
+        generate(meta['size']),
+        mimetype='text/csv',
+        headers={'Content-Disposition': 'attachment; filename=gbv_assessments.csv'}
+    )
+    response.call_on_close(handle.close)
+    response.content_length = meta['size']
+    response.last_modified = meta['modified']
+    database = hashlib.sha256(meta['database'].encode('utf-8')).hexdigest()[:12]
+    response.set_etag(f"{database}-{meta['max_id']}-{meta['version']}")
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+@app.route("/download_<any(parquet, arrow, ndjson):fmt>")
+def download_export(fmt):
+    if not session.get('admin'):
+        return redirect(url_for('admin'))
+
+    try:
+        cursor = get_snapshot_db().execute(f'SELECT {SELECT_COLUMNS} FROM assessments ORDER BY id')
+    except sqlite3.Error as e:
+        return database_error(e)
+
+    if fmt == 'ndjson':
+        def generate():
+            try:
+                yield from iter_ndjson(cursor)
+            finally:
+                cursor.close()
+
+        return app.response_class(
+            generate(),
+            mimetype='application/x-ndjson',
+            headers={'Content-Disposition': 'attachment; filename=gbv_assessments.ndjson'}
         )
+
+    # Parquet and Arrow files are written batch by batch to a temporary file
+    # on disk, then streamed from there.
+    output = tempfile.TemporaryFile()
+    try:
+        write_columnar(cursor, output, fmt)
+    except ImportError:
+        output.close()
+        return "Columnar exports require the pyarrow package.", 501
     except sqlite3.Error as e:
-        print(f"Database error: {e}")
-        return "Database error occurred.", 500
+        output.close()
+        return database_error(e)
+    finally:
+        cursor.close()
+    output.seek(0)
+
+    extension = 'parquet' if fmt == 'parquet' else 'arrow'
+    return send_file(
+        output,
+        mimetype='application/vnd.apache.parquet' if fmt == 'parquet' else 'application/vnd.apache.arrow.file',
+        as_attachment=True,
+        download_name=f'gbv_assessments.{extension}'
+    )
+
+# Schema creation and migrations run once per deploy (gunicorn's on_starting
+# hook or this command), not on import in every worker.
+@app.cli.command('init-db')
+def init_db_command():
+    """Create the schema and apply pending migrations."""
+    init_db()
+    click.echo('Database schema is up to date.')
+
+@app.cli.command('rebuild-stats')
+@click.option('--check', is_flag=True, help='Only report drift, do not rewrite the table.')
+def rebuild_stats_command(check):
+    """Recompute assessment_stats from the assessments table."""
+    with closing(connect_db()) as conn, conn:
+        drift = rebuild_stats(conn, check_only=check)
+    for key, (current, expected) in sorted(drift.items()):
+        click.echo(f"{' / '.join(str(part) for part in key)}: {current} -> {expected}")
+    if not drift:
+        click.echo('assessment_stats is up to date.')
+    elif check:
+        raise SystemExit(1)
+    else:
+        click.echo(f'Rebuilt assessment_stats ({len(drift)} rows corrected).')
+
+@app.cli.command('refresh-trends')
+def refresh_trends_command():
+    """Fold new assessments into the daily and weekly trend rollups."""
+    with closing(connect_db()) as conn:
+        days, weeks = refresh_trends(conn)
+    click.echo(f'Refreshed {days} day(s) and {weeks} week(s).')
+
+@app.cli.command('snapshot')
+def snapshot_command():
+    """Replace the read-only snapshot used by the admin pages and exports."""
+    path = snapshot_path()
+    start = time.perf_counter()
+    refresh_snapshot(path, force=True)
+    with closing(open_snapshot(path)) as conn:
+        rows = conn.execute('SELECT COUNT(*) FROM assessments').fetchone()[0]
+    click.echo(f'Wrote {path} ({rows:,} assessments) in {time.perf_counter() - start:.1f}s.')
+
+IMPORT_BATCH_SIZE = 10000
+
+@app.cli.command('import-legacy')
+@click.argument('paths', nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option('--batch-size', default=IMPORT_BATCH_SIZE, show_default=True, help='Records per transaction.')
+def import_legacy_command(paths, batch_size):
+    """Import legacy responses.json arrays or JSON Lines files."""
+    from legacy_import import iter_records
+
+    init_db()
+    totals = {'stored': 0, 'duplicate': 0, 'invalid': 0}
+    errors = {}
+    start = time.perf_counter()
+
+    def flush(batch):
+        for result in ingest_records(batch, legacy_row, require_client_id=True):
+            totals[result['status']] += 1
+            if result['status'] == 'invalid':
+                errors[result['error']] = errors.get(result['error'], 0) + 1
+
+    # The legacy UUID becomes the client_id, so importing the same archive
+    # twice (or overlapping archives) stores each record once. Records saved
+    # without one are keyed by a hash of their contents instead.
+    for path in paths:
+        batch = []
+        try:
+            for record in iter_records(path):
+                if isinstance(record, dict) and record.get('id'):
+                    record = dict(record, client_id=f"legacy:{record['id']}")
+                elif isinstance(record, dict):
+                    digest = hashlib.sha256(json.dumps(record, sort_keys=True).encode('utf-8')).hexdigest()[:32]
+                    record = dict(record, client_id=f'legacy:{digest}')
+                batch.append(record)
+                if len(batch) >= batch_size:
+                    flush(batch)
+                    batch = []
+                    processed = sum(totals.values())
+                    click.echo(f'{path}: {processed:,} records, {processed / (time.perf_counter() - start):,.0f} rows/s', err=True)
+            if batch:
+                flush(batch)
+        except ValueError as e:
+            raise click.ClickException(f'{path}: {e}')
+
+    elapsed = time.perf_counter() - start
+    processed = sum(totals.values())
+    click.echo(
+        f"Imported {totals['stored']:,} of {processed:,} records in {elapsed:.1f}s "
+        f"({processed / elapsed if elapsed else 0:,.0f} rows/s); "
+        f"{totals['duplicate']:,} duplicate(s), {totals['invalid']:,} invalid."
+    )
+    for error, count in sorted(errors.items(), key=lambda item: -item[1]):
+        click.echo(f'  {count:,} x {error}')
 
 if __name__ == '__main__':
+    init_db()
     app.run(debug=True)
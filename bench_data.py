@@ -0,0 +1,242 @@
+"""Synthetic assessment data and data-scale benchmarks.
+
+`generate` grows a database to the requested number of rows with realistic
+age/gender/language mixes, answer patterns, coded gender/level/support
+columns and timestamps spread over the past year. `run` grows the database through
+a list of scale points and, at each one, times the dashboard aggregation,
+CSV export, paginated reads and inserts using the app's own code:
+
+    python bench_data.py generate --rows 1000000
+    python bench_data.py run --scales 1M,5M,10M -o scale.json
+
+Both default to bench_assessments.db so the live database is never touched;
+pass --database explicitly to target another file.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DATABASE = os.path.join(HERE, 'bench_assessments.db')
+BATCH_SIZE = 50000
+
+# Share answering "yes" to each question among respondents with and without
+# wider exposure; about a quarter of respondents are in the exposed group.
+EXPOSED_SHARE = 0.25
+YES_EXPOSED = np.array([0.45, 0.50, 0.35, 0.30, 0.25, 0.30, 0.35, 0.20, 0.40, 0.20])
+YES_OTHERS = np.array([0.04, 0.06, 0.03, 0.02, 0.02, 0.02, 0.03, 0.01, 0.04, 0.01])
+AGES = np.arange(13, 36)
+AGE_WEIGHTS = np.array([3, 4, 5, 6, 7, 7, 8, 8, 8, 7, 7, 6, 5, 5, 4, 4, 3, 3, 3, 2, 2, 2, 2], dtype=np.float64)
+
+
+def parse_count(text):
+    text = text.strip().upper()
+    for suffix, factor in (('K', 1000), ('M', 1000000)):
+        if text.endswith(suffix):
+            return int(float(text[:-1]) * factor)
+    return int(text)
+
+
+def load_app(database):
+    os.environ['GBV_DATABASE'] = os.path.abspath(database)
+    sys.path.insert(0, HERE)
+    import app
+    app.init_db()
+    return app
+
+
+def synthetic_rows(rng, count, start, span):
+    ages = rng.choice(AGES, size=count, p=AGE_WEIGHTS / AGE_WEIGHTS.sum())
+    genders = (rng.random(count) < 0.55).astype(np.int64)
+    languages = np.where(rng.random(count) < 0.6, 'sw', 'en')
+    exposed = rng.random(count) < EXPOSED_SHARE
+    probabilities = np.where(exposed[:, None], YES_EXPOSED, YES_OTHERS)
+    answers_matrix = rng.random((count, 10)) < probabilities
+    answers = (answers_matrix * (1 << np.arange(10))).sum(axis=1)
+    yes_counts = answers_matrix.sum(axis=1)
+    support_draw = rng.random(count)
+    offsets = np.sort(rng.random(count)) * span.total_seconds()
+
+    rows = []
+    for i in range(count):
+        language = languages[i]
+        risk = yes_counts[i] > 0
+        if support_draw[i] < 0.3:
+            support = None
+        else:
+            support = 1 if support_draw[i] < (0.75 if risk else 0.5) else 0
+        rows.append((
+            int(ages[i]), int(genders[i]), language, int(answers[i]), 1, int(yes_counts[i]), 10 - int(yes_counts[i]),
+            int(risk), support,
+            (start + timedelta(seconds=float(offsets[i]))).isoformat(' ')
+        ))
+    return rows
+
+
+def grow(app, target, seed=0, days=365, quiet=False, total=None):
+    conn = app.connect_db()
+    conn.execute('PRAGMA synchronous = OFF')
+    current = conn.execute('SELECT COUNT(*) FROM assessments').fetchone()[0]
+    if current >= target:
+        conn.close()
+        return current, 0.0
+
+    rng = np.random.default_rng(seed + current)
+    span = timedelta(days=days)
+    # The span is shared out over `total` rows (the largest scale point of a
+    # run) and each batch covers the next slice of it, so timestamps keep
+    # rising with id from one scale point to the next.
+    step = span / max(total or target, target)
+    start = datetime.now() - span + step * current
+    columns = ', '.join(app.INSERT_COLUMNS)
+    placeholders = ', '.join('?' * len(app.INSERT_COLUMNS))
+
+    began = time.perf_counter()
+    remaining = target - current
+    while remaining:
+        count = min(BATCH_SIZE, remaining)
+        rows = synthetic_rows(rng, count, start, step * count)
+        start += step * count
+        with conn:
+            conn.executemany(f'INSERT INTO assessments ({columns}) VALUES ({placeholders})', rows)
+        remaining -= count
+        if not quiet:
+            done = target - remaining - current
+            rate = done / (time.perf_counter() - began)
+            print(f'\r{target - remaining:,} rows ({rate:,.0f} rows/s)', end='', file=sys.stderr, flush=True)
+    if not quiet:
+        print(file=sys.stderr)
+    elapsed = time.perf_counter() - began
+    conn.close()
+    return target, elapsed
+
+
+def timed(function, repeat=1):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best * 1000, 3), result
+
+
+def benchmark(app, repeat, insert_rows):
+    import analytics
+
+    conn = app.connect_db()
+    results = {}
+
+    results['dashboard_rollup_ms'], _ = timed(lambda: app.dashboard_stats(conn), repeat)
+    results['dashboard_group_by_ms'], _ = timed(lambda: app.compute_stats(conn), repeat)
+
+    def cold_analytics():
+        analytics._state.clear()
+        return analytics.question_summary(conn, app.QUESTION_SET_VERSION, app.QUESTION_GROUPS)
+    results['question_analytics_cold_ms'], _ = timed(cold_analytics)
+    results['question_analytics_warm_ms'], _ = timed(
+        lambda: analytics.question_summary(conn, app.QUESTION_SET_VERSION, app.QUESTION_GROUPS), repeat
+    )
+    results['refresh_trends_ms'], _ = timed(lambda: app.refresh_trends(conn))
+
+    # Formatting every row from the database, as /download_csv did before the
+    # export was kept on disk.
+    def export_csv():
+        cursor = conn.execute(f'SELECT {app.SELECT_COLUMNS} FROM assessments ORDER BY id')
+        size = len(app.format_csv([], header=True))
+        while True:
+            rows = cursor.fetchmany(app.CSV_BATCH_SIZE)
+            if not rows:
+                break
+            size += len(app.format_csv(rows))
+        return size
+    results['csv_export_uncached_ms'], size = timed(export_csv)
+    results['csv_export_mb'] = round(size / 1e6, 1)
+    results['csv_export_uncached_mb_per_s'] = round(size / 1e6 / (results['csv_export_uncached_ms'] / 1000), 1) if size else 0
+
+    # What /download_csv does now: bring the stored file up to date and read
+    # it back. Cold rebuilds the file; warm finds it current.
+    def cached_csv():
+        handle, meta = app.open_csv_artifact(conn)
+        with handle:
+            remaining = meta['size']
+            while remaining:
+                remaining -= len(handle.read(min(remaining, 1 << 20)))
+        return meta['size']
+
+    def cold_cached_csv():
+        _, meta_path, _ = app.csv_artifact_paths()
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        return cached_csv()
+    results['csv_export_cold_ms'], _ = timed(cold_cached_csv)
+    results['csv_export_warm_ms'], _ = timed(cached_csv, repeat)
+
+    max_id = conn.execute('SELECT MAX(id) FROM assessments').fetchone()[0] or 0
+    for name, after in (('first', None), ('middle', max_id // 2), ('deep', max(2, max_id // 100))):
+        results[f'page_{name}_ms'], _ = timed(
+            lambda: app.fetch_assessments_page(conn, after, None, app.ADMIN_PAGE_SIZE), repeat
+        )
+
+    # Stamped with the latest time in the table so ids keep rising with time.
+    latest = conn.execute('SELECT MAX(timestamp) FROM assessments').fetchone()[0] or datetime.now().isoformat(' ')
+    row = (20, 1, 'sw', 0, app.QUESTION_SET_VERSION, 0, 10, 0, None, latest)
+    single_ms, _ = timed(lambda: [app.write_assessments(conn, [row]) for _ in range(insert_rows)])
+    results['insert_single_rows_per_s'] = round(insert_rows / (single_ms / 1000), 1)
+    batch_ms, _ = timed(lambda: app.write_assessments(conn, [row] * insert_rows))
+    results['insert_batch_rows_per_s'] = round(insert_rows / (batch_ms / 1000), 1)
+
+    conn.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    generate = subparsers.add_parser('generate', help='grow the database to --rows rows')
+    generate.add_argument('--rows', type=parse_count, required=True, help='target row count, e.g. 1M or 50M')
+
+    run = subparsers.add_parser('run', help='grow through scale points and benchmark each')
+    run.add_argument('--scales', default='100K,1M', help='comma-separated row counts, e.g. 1M,5M,10M,50M')
+    run.add_argument('--repeat', type=int, default=3, help='repeat cheap measurements and keep the best')
+    run.add_argument('--insert-rows', type=int, default=200, help='rows written by the insert benchmarks')
+    run.add_argument('-o', '--output', help='write the JSON report to this file')
+
+    for subparser in (generate, run):
+        subparser.add_argument('--database', default=DEFAULT_DATABASE)
+        subparser.add_argument('--days', type=int, default=365, help='spread timestamps over this many days')
+        subparser.add_argument('--seed', type=int, default=0)
+
+    args = parser.parse_args()
+    app = load_app(args.database)
+
+    if args.command == 'generate':
+        rows, elapsed = grow(app, args.rows, args.seed, args.days)
+        print(json.dumps({'database': args.database, 'rows': rows, 'generate_s': round(elapsed, 1)}))
+        return 0
+
+    report = {'database': args.database, 'scales': []}
+    scales = [parse_count(value) for value in args.scales.split(',')]
+    for scale in scales:
+        rows, elapsed = grow(app, scale, args.seed, args.days, total=max(scales))
+        result = {'rows': rows, 'generate_s': round(elapsed, 1)}
+        result.update(benchmark(app, args.repeat, args.insert_rows))
+        report['scales'].append(result)
+        print(json.dumps(result), file=sys.stderr)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            handle.write(output + '\n')
+    print(output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
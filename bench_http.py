@@ -0,0 +1,288 @@
+"""HTTP load benchmark for the assessment flow and the admin pages.
+
+Each virtual user walks the real survey flow with its own cookie session:
+
+    GET  /about
+    POST /assessment            agree
+    POST /assessment            submit_initial (age, gender)
+    POST /assessment            submit_questions (ten answers)
+    GET  /update_support/<yes|no>/<lang>
+
+Admin users log in once and then alternate GET /admin and GET /download_csv.
+Latency percentiles and throughput per step are printed as JSON so runs can
+be diffed between commits:
+
+    python bench_http.py --users 16 --iterations 50                 # in-process app
+    python bench_http.py --gunicorn 4 --users 32 --duration 30      # local gunicorn
+    python bench_http.py --url http://127.0.0.1:8000 --users 8 -o before.json
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ADMIN_PASSWORD = 'admin123'
+
+
+class InProcessClient:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, data=None):
+        response = self.client.open(path, method=method, data=data)
+        size = len(response.get_data())
+        response.close()
+        return response.status_code, size
+
+
+class HTTPClient:
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        self.connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=60)
+        self.cookies = {}
+
+    def request(self, method, path, data=None):
+        headers = {}
+        body = None
+        if data is not None:
+            body = urlencode(data)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{name}={value}' for name, value in self.cookies.items())
+        try:
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            self.connection.close()
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+        size = 0
+        while True:
+            chunk = response.read(65536)
+            if not chunk:
+                break
+            size += len(chunk)
+        for header in response.headers.get_all('Set-Cookie') or []:
+            name, _, value = header.split(';', 1)[0].partition('=')
+            self.cookies[name.strip()] = value
+        return response.status, size
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}
+        self.errors = {}
+
+    def timed(self, step, client, method, path, data=None, expect=(200, 302, 304)):
+        start = time.perf_counter()
+        try:
+            status, _ = client.request(method, path, data)
+            ok = status in expect
+        except (OSError, http.client.HTTPException):
+            ok = False
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            self.samples.setdefault(step, []).append(elapsed)
+            if not ok:
+                self.errors[step] = self.errors.get(step, 0) + 1
+        return ok
+
+
+def assessment_flow(recorder, client, rng):
+    language = rng.choice(['en', 'sw'])
+    answers = {f'q{i}': 'yes' if rng.random() < 0.15 else 'no' for i in range(10)}
+    answers['submit_questions'] = ''
+    answers['current_language'] = language
+    support = rng.choice(['yes', 'no'])
+
+    recorder.timed('about', client, 'GET', '/about')
+    recorder.timed('agree', client, 'POST', '/assessment', {'agree': ''})
+    recorder.timed('submit_initial', client, 'POST', '/assessment', {
+        'submit_initial': '', 'age': str(rng.randint(13, 35)), 'gender': rng.choice(['Male', 'Female'])
+    })
+    recorder.timed('submit_questions', client, 'POST', '/assessment', answers)
+    recorder.timed('update_support', client, 'GET', f'/update_support/{support}/{language}')
+
+
+def admin_flow(recorder, client):
+    recorder.timed('admin', client, 'GET', '/admin')
+    recorder.timed('download_csv', client, 'GET', '/download_csv')
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def summarize(recorder, elapsed, flows):
+    steps = {}
+    total_requests = 0
+    for step, values in recorder.samples.items():
+        values = sorted(values)
+        total_requests += len(values)
+        steps[step] = {
+            'count': len(values),
+            'errors': recorder.errors.get(step, 0),
+            'throughput_rps': round(len(values) / elapsed, 2),
+            'mean_ms': round(sum(values) / len(values) * 1000, 3),
+            'p50_ms': round(percentile(values, 0.50) * 1000, 3),
+            'p95_ms': round(percentile(values, 0.95) * 1000, 3),
+            'p99_ms': round(percentile(values, 0.99) * 1000, 3),
+            'max_ms': round(values[-1] * 1000, 3),
+        }
+    return {
+        'duration_s': round(elapsed, 3),
+        'requests': total_requests,
+        'requests_per_s': round(total_requests / elapsed, 2),
+        'flows': flows,
+        'flows_per_s': round(flows / elapsed, 2),
+        'steps': steps,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_gunicorn(workers, env):
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', 'app:app', '-w', str(workers), '-b', f'127.0.0.1:{port}'],
+        cwd=HERE, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return process, f'http://127.0.0.1:{port}'
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise SystemExit('gunicorn did not start listening within 30s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--url', help='benchmark an already running server')
+    target.add_argument('--gunicorn', type=int, metavar='WORKERS', help='start a local gunicorn with this many workers')
+    parser.add_argument('--database', help='database file for in-process/gunicorn runs (default: a fresh temporary file)')
+    parser.add_argument('--users', type=int, default=8, help='concurrent assessment users')
+    parser.add_argument('--admin-users', type=int, default=1, help='concurrent admin users')
+    parser.add_argument('--iterations', type=int, default=20, help='flows per user (ignored with --duration)')
+    parser.add_argument('--duration', type=float, help='run for this many seconds instead of a fixed iteration count')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('-o', '--output', help='write the JSON report to this file')
+    args = parser.parse_args()
+
+    tempdir = None
+    server = None
+    if args.url is None:
+        database = args.database
+        if database is None:
+            tempdir = tempfile.mkdtemp(prefix='gbv-bench-')
+            database = os.path.join(tempdir, 'bench.db')
+        os.environ['GBV_DATABASE'] = os.path.abspath(database)
+
+    if args.url:
+        base_url = args.url
+        make_client = lambda: HTTPClient(base_url)
+        mode = 'http'
+    elif args.gunicorn:
+        sys.path.insert(0, HERE)
+        from app import init_db
+        init_db()
+        server, base_url = start_gunicorn(args.gunicorn, dict(os.environ))
+        make_client = lambda: HTTPClient(base_url)
+        mode = f'gunicorn x{args.gunicorn}'
+    else:
+        sys.path.insert(0, HERE)
+        from app import app, init_db
+        init_db()
+        make_client = lambda: InProcessClient(app)
+        mode = 'in-process'
+
+    recorder = Recorder()
+    flows = [0]
+    flows_lock = threading.Lock()
+    deadline = time.monotonic() + args.duration if args.duration else None
+
+    def keep_going(done):
+        return time.monotonic() < deadline if deadline else done < args.iterations
+
+    def run_user(number):
+        rng = random.Random(args.seed * 1000 + number)
+        client = make_client()
+        done = 0
+        while keep_going(done):
+            assessment_flow(recorder, client, rng)
+            done += 1
+        with flows_lock:
+            flows[0] += done
+
+    def run_admin():
+        client = make_client()
+        recorder.timed('admin_login', client, 'POST', '/admin-login', {'password': ADMIN_PASSWORD})
+        done = 0
+        while keep_going(done):
+            admin_flow(recorder, client)
+            done += 1
+
+    threads = [threading.Thread(target=run_user, args=(number,)) for number in range(args.users)]
+    threads += [threading.Thread(target=run_admin) for _ in range(args.admin_users)]
+    try:
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        if tempdir is not None:
+            shutil.rmtree(tempdir, ignore_errors=True)
+
+    report = {
+        'revision': git_revision(),
+        'mode': mode,
+        'users': args.users,
+        'admin_users': args.admin_users,
+        'iterations': None if args.duration else args.iterations,
+        **summarize(recorder, elapsed, flows[0]),
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            handle.write(output + '\n')
+    print(output)
+    return 1 if any(step['errors'] for step in report['steps'].values()) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
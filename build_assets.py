@@ -0,0 +1,301 @@
+"""Build the self-hosted stylesheet and scripts in static/dist.
+
+The templates in app.py are scanned for the utility classes they actually
+use and only those rules are generated (Tailwind's names and scale), between
+the assets/base.css reset and assets/site.css. Each output gets a content hash
+in its name plus .gz/.br variants, and static/dist/manifest.json maps the
+logical names app.py links to onto the hashed files:
+
+    python build_assets.py            # rebuild static/dist
+    python build_assets.py --check    # exit 1 if static/dist is out of date
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+TEMPLATE_SOURCES = [os.path.join(HERE, 'app.py')]
+DIST = os.path.join(HERE, 'static', 'dist')
+BUNDLES = {
+    'app.css': ['assets/base.css', '@utilities', 'assets/site.css'],
+    'chart.js': ['assets/vendor/chart-4.4.0.umd.min.js'],
+}
+
+BREAKPOINTS = {'sm': '640px', 'md': '768px', 'lg': '1024px', 'xl': '1280px'}
+STATES = ['hover', 'focus']
+
+COLORS = {
+    'white': '#ffffff',
+    'black': '#000000',
+    'transparent': 'transparent',
+}
+PALETTE = {
+    'gray': ['#f9fafb', '#f3f4f6', '#e5e7eb', '#d1d5db', '#9ca3af', '#6b7280', '#4b5563', '#374151', '#1f2937', '#111827'],
+    'red': ['#fef2f2', '#fee2e2', '#fecaca', '#fca5a5', '#f87171', '#ef4444', '#dc2626', '#b91c1c', '#991b1b', '#7f1d1d'],
+    'green': ['#f0fdf4', '#dcfce7', '#bbf7d0', '#86efac', '#4ade80', '#22c55e', '#16a34a', '#15803d', '#166534', '#14532d'],
+    'blue': ['#eff6ff', '#dbeafe', '#bfdbfe', '#93c5fd', '#60a5fa', '#3b82f6', '#2563eb', '#1d4ed8', '#1e40af', '#1e3a8a'],
+    'yellow': ['#fefce8', '#fef9c3', '#fef08a', '#fde047', '#facc15', '#eab308', '#ca8a04', '#a16207', '#854d0e', '#713f12'],
+}
+for name, shades in PALETTE.items():
+    for shade, value in zip([50, 100, 200, 300, 400, 500, 600, 700, 800, 900], shades):
+        COLORS[f'{name}-{shade}'] = value
+
+FONT_SIZES = {
+    'xs': ('0.75rem', '1rem'), 'sm': ('0.875rem', '1.25rem'), 'base': ('1rem', '1.5rem'),
+    'lg': ('1.125rem', '1.75rem'), 'xl': ('1.25rem', '1.75rem'), '2xl': ('1.5rem', '2rem'),
+    '3xl': ('1.875rem', '2.25rem'), '4xl': ('2.25rem', '2.5rem'),
+}
+MAX_WIDTHS = {
+    'xs': '20rem', 'sm': '24rem', 'md': '28rem', 'lg': '32rem', 'xl': '36rem', '2xl': '42rem',
+    '3xl': '48rem', '4xl': '56rem', '5xl': '64rem', '6xl': '72rem', 'full': '100%',
+}
+TRANSITIONS = {
+    'transition': 'color, background-color, border-color, text-decoration-color, fill, stroke, opacity, box-shadow, transform, filter',
+    'transition-all': 'all',
+    'transition-colors': 'color, background-color, border-color, text-decoration-color, fill, stroke',
+}
+STATIC_UTILITIES = {
+    'block': 'display: block',
+    'inline-block': 'display: inline-block',
+    'inline': 'display: inline',
+    'flex': 'display: flex',
+    'inline-flex': 'display: inline-flex',
+    'grid': 'display: grid',
+    'table': 'display: table',
+    'hidden': 'display: none',
+    'relative': 'position: relative',
+    'absolute': 'position: absolute',
+    'sticky': 'position: sticky',
+    'overflow-hidden': 'overflow: hidden',
+    'overflow-x-auto': 'overflow-x: auto',
+    'flex-row': 'flex-direction: row',
+    'flex-col': 'flex-direction: column',
+    'flex-wrap': 'flex-wrap: wrap',
+    'flex-grow': 'flex-grow: 1',
+    'flex-1': 'flex: 1 1 0%',
+    'items-start': 'align-items: flex-start',
+    'items-center': 'align-items: center',
+    'items-end': 'align-items: flex-end',
+    'justify-start': 'justify-content: flex-start',
+    'justify-center': 'justify-content: center',
+    'justify-between': 'justify-content: space-between',
+    'justify-end': 'justify-content: flex-end',
+    'min-h-screen': 'min-height: 100vh',
+    'min-w-full': 'min-width: 100%',
+    'w-full': 'width: 100%',
+    'w-auto': 'width: auto',
+    'h-full': 'height: 100%',
+    'rounded': 'border-radius: 0.25rem',
+    'rounded-md': 'border-radius: 0.375rem',
+    'rounded-lg': 'border-radius: 0.5rem',
+    'rounded-xl': 'border-radius: 0.75rem',
+    'rounded-full': 'border-radius: 9999px',
+    'border': 'border-width: 1px',
+    'border-2': 'border-width: 2px',
+    'border-t': 'border-top-width: 1px',
+    'border-b': 'border-bottom-width: 1px',
+    'shadow': 'box-shadow: 0 1px 3px 0 rgb(0 0 0 / 0.1), 0 1px 2px -1px rgb(0 0 0 / 0.1)',
+    'shadow-md': 'box-shadow: 0 4px 6px -1px rgb(0 0 0 / 0.1), 0 2px 4px -2px rgb(0 0 0 / 0.1)',
+    'shadow-lg': 'box-shadow: 0 10px 15px -3px rgb(0 0 0 / 0.1), 0 4px 6px -4px rgb(0 0 0 / 0.1)',
+    'text-left': 'text-align: left',
+    'text-center': 'text-align: center',
+    'text-right': 'text-align: right',
+    'font-normal': 'font-weight: 400',
+    'font-medium': 'font-weight: 500',
+    'font-semibold': 'font-weight: 600',
+    'font-bold': 'font-weight: 700',
+    'leading-tight': 'line-height: 1.25',
+    'leading-normal': 'line-height: 1.5',
+    'leading-relaxed': 'line-height: 1.625',
+    'uppercase': 'text-transform: uppercase',
+    'underline': 'text-decoration-line: underline',
+    'list-disc': 'list-style-type: disc',
+    'list-decimal': 'list-style-type: decimal',
+    'cursor-pointer': 'cursor: pointer',
+}
+
+SPACING_PROPERTIES = {
+    'm': ['margin'], 'mt': ['margin-top'], 'mb': ['margin-bottom'], 'ml': ['margin-left'], 'mr': ['margin-right'],
+    'mx': ['margin-left', 'margin-right'], 'my': ['margin-top', 'margin-bottom'],
+    'p': ['padding'], 'pt': ['padding-top'], 'pb': ['padding-bottom'], 'pl': ['padding-left'], 'pr': ['padding-right'],
+    'px': ['padding-left', 'padding-right'], 'py': ['padding-top', 'padding-bottom'],
+    'gap': ['gap'], 'w': ['width'], 'h': ['height'],
+}
+SPACING_PATTERN = re.compile(r'^(m[tblrxy]?|p[tblrxy]?|gap|w|h)-(\d+(?:\.5)?|px|auto)$')
+SPACE_PATTERN = re.compile(r'^space-([xy])-(\d+(?:\.5)?)$')
+GRID_PATTERN = re.compile(r'^grid-cols-(\d+)$')
+COLOR_PATTERN = re.compile(r'^(bg|text|border)-(.+)$')
+CLASS_ATTRIBUTE = re.compile(r'class="((?:[^"{]|\{\{.*?\}\}|\{%.*?%\})*)"')
+# Rules are emitted group by group in this order so that, as in Tailwind,
+# later groups win over earlier ones at equal specificity.
+GROUPS = ['layout', 'spacing', 'sizing', 'typography', 'color', 'effects', 'timing']
+
+
+def spacing_value(value):
+    if value == 'px':
+        return '1px'
+    if value == 'auto':
+        return 'auto'
+    number = float(value) * 0.25
+    return '0px' if number == 0 else f'{number:g}rem'
+
+
+def utility(name):
+    """Return (group, selector suffix, declarations) for a class, or None."""
+    if name in STATIC_UTILITIES:
+        group = 'typography' if name.startswith(('text-', 'font-', 'leading-', 'underline', 'uppercase', 'list-')) else 'layout'
+        return group, '', STATIC_UTILITIES[name]
+    if name in TRANSITIONS:
+        return 'effects', '', (
+            f'transition-property: {TRANSITIONS[name]}; '
+            'transition-timing-function: cubic-bezier(0.4, 0, 0.2, 1); transition-duration: 150ms'
+        )
+    if name.startswith('duration-') and name[9:].isdigit():
+        return 'timing', '', f'transition-duration: {name[9:]}ms'
+    if name.startswith('max-w-') and name[6:] in MAX_WIDTHS:
+        return 'sizing', '', f'max-width: {MAX_WIDTHS[name[6:]]}'
+    if name.startswith('text-') and name[5:] in FONT_SIZES:
+        size, line_height = FONT_SIZES[name[5:]]
+        return 'typography', '', f'font-size: {size}; line-height: {line_height}'
+    match = GRID_PATTERN.match(name)
+    if match:
+        return 'layout', '', f'grid-template-columns: repeat({match.group(1)}, minmax(0, 1fr))'
+    match = SPACING_PATTERN.match(name)
+    if match:
+        prefix, value = match.groups()
+        group = 'sizing' if prefix in ('w', 'h') else 'spacing'
+        return group, '', '; '.join(f'{prop}: {spacing_value(value)}' for prop in SPACING_PROPERTIES[prefix])
+    match = SPACE_PATTERN.match(name)
+    if match:
+        axis, value = match.groups()
+        prop = 'margin-top' if axis == 'y' else 'margin-left'
+        return 'spacing', ' > :not([hidden]) ~ :not([hidden])', f'{prop}: {spacing_value(value)}'
+    match = COLOR_PATTERN.match(name)
+    if match and match.group(2) in COLORS:
+        prop = {'bg': 'background-color', 'text': 'color', 'border': 'border-color'}[match.group(1)]
+        return 'color', '', f'{prop}: {COLORS[match.group(2)]}'
+    return None
+
+
+def template_classes(paths):
+    classes = set()
+    for path in paths:
+        with open(path) as handle:
+            source = handle.read()
+        for match in CLASS_ATTRIBUTE.finditer(source):
+            classes.update(token for token in re.split(r"[\s'\"{}%()\[\],]+", match.group(1)) if token)
+    return classes
+
+
+def utilities_css(classes):
+    rules = []
+    unknown = []
+    for name in classes:
+        *variants, base = name.split(':')
+        found = utility(base)
+        if found is None or any(v not in BREAKPOINTS and v not in STATES for v in variants):
+            unknown.append(name)
+            continue
+        group, suffix, declarations = found
+        states = ''.join(f':{v}' for v in variants if v in STATES)
+        breakpoint = next((v for v in variants if v in BREAKPOINTS), None)
+        selector = '.' + name.replace(':', '\\:') + states + suffix
+        rank = list(BREAKPOINTS).index(breakpoint) + 1 if breakpoint else 0
+        rules.append((rank, GROUPS.index(group), bool(states), name, breakpoint, f'{selector} {{ {declarations} }}'))
+
+    lines = []
+    current = None
+    for rank, _, _, _, breakpoint, rule in sorted(rules):
+        if breakpoint != current:
+            if current is not None:
+                lines.append('}')
+            if breakpoint is not None:
+                lines.append(f'@media (min-width: {BREAKPOINTS[breakpoint]}) {{')
+            current = breakpoint
+        lines.append(('    ' if breakpoint else '') + rule)
+    if current is not None:
+        lines.append('}')
+    return '\n'.join(lines) + '\n', sorted(unknown)
+
+
+def bundle(parts, utilities):
+    chunks = []
+    for part in parts:
+        if part == '@utilities':
+            chunks.append(utilities)
+        else:
+            with open(os.path.join(HERE, part)) as handle:
+                chunks.append(handle.read())
+    return '\n'.join(chunks).encode('utf-8')
+
+
+def hashed_name(name, body):
+    stem, extension = os.path.splitext(name)
+    return f'{stem}.{hashlib.sha256(body).hexdigest()[:12]}{extension}'
+
+
+def build(check=False, verbose=False):
+    utilities, unknown = utilities_css(template_classes(TEMPLATE_SOURCES))
+    if verbose:
+        print('not utilities (component or template tokens): ' + ' '.join(unknown))
+
+    outputs = {}
+    manifest = {}
+    for name, parts in BUNDLES.items():
+        body = bundle(parts, utilities)
+        filename = hashed_name(name, body)
+        manifest[name] = filename
+        outputs[filename] = body
+        gzipped = gzip.compress(body, 9, mtime=0)
+        if len(gzipped) < len(body):
+            outputs[filename + '.gz'] = gzipped
+        if brotli is not None:
+            compressed = brotli.compress(body, quality=11)
+            if len(compressed) < len(body):
+                outputs[filename + '.br'] = compressed
+    outputs['manifest.json'] = (json.dumps(manifest, indent=2, sort_keys=True) + '\n').encode('utf-8')
+
+    existing = set(os.listdir(DIST)) if os.path.isdir(DIST) else set()
+    if check:
+        stale = [name for name in manifest.values() if name not in existing]
+        manifest_path = os.path.join(DIST, 'manifest.json')
+        if not os.path.exists(manifest_path) or open(manifest_path, 'rb').read() != outputs['manifest.json']:
+            stale.append('manifest.json')
+        for name in stale:
+            print(f'out of date: static/dist/{name}')
+        return 1 if stale else 0
+
+    os.makedirs(DIST, exist_ok=True)
+    for name in existing - set(outputs):
+        os.remove(os.path.join(DIST, name))
+    for name, body in outputs.items():
+        with open(os.path.join(DIST, name), 'wb') as handle:
+            handle.write(body)
+    for name, filename in manifest.items():
+        sizes = ', '.join(
+            f'{suffix or "raw"} {len(outputs[filename + suffix]) / 1024:.1f} KiB'
+            for suffix in ('', '.gz', '.br') if filename + suffix in outputs
+        )
+        print(f'static/dist/{filename}: {sizes}')
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--check', action='store_true', help='only report whether static/dist is up to date')
+    parser.add_argument('-v', '--verbose', action='store_true', help='list class tokens that are not utilities')
+    args = parser.parse_args()
+    return build(args.check, args.verbose)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
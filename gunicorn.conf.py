@@ -0,0 +1,29 @@
+# Loaded automatically by `gunicorn app:app` from the project directory.
+import glob
+import os
+import tempfile
+
+# Workers write their metrics to files here so /metrics can add them up
+# across processes. Set before any worker imports prometheus_client.
+if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = tempfile.mkdtemp(prefix='gbv-metrics-')
+
+# Threaded workers by default, so concurrent submissions in one worker can
+# share a write-behind batch (GBV_WRITE_BEHIND) instead of committing one by
+# one. Deployments can pick their own worker model through these variables.
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', 8 if worker_class == 'gthread' else 1))
+
+
+def on_starting(server):
+    # Runs once in the master before any worker is forked, so workers start
+    # without touching the schema.
+    for path in glob.glob(os.path.join(os.environ['PROMETHEUS_MULTIPROC_DIR'], '*.db')):
+        os.remove(path)
+    from app import init_db
+    init_db()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,101 @@
+import json
+
+CHUNK_SIZE = 1 << 20
+
+# The old storage wrote responses.json as one JSON array and the request log
+# as JSON Lines. Both are read a chunk or a line at a time, so an archive of
+# any size is parsed in constant memory.
+
+
+# A value cut off by the end of a chunk either fails to decode as an
+# unterminated string or within the last few characters of the buffer (a
+# partial literal or escape), or decodes as a shorter number ('12' of
+# '12.5e3'). Any other error is in the data itself.
+CUT_OFF_CHARS = 6
+
+
+def cut_off(error, buffer):
+    return error.msg.startswith('Unterminated string') or error.pos >= len(buffer) - CUT_OFF_CHARS
+
+
+def iter_json_array(handle, chunk_size=CHUNK_SIZE):
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    # What may come next: the opening '[', the first value or ']', a value
+    # after a comma, ',' / ']' after a value, or only whitespace after ']'.
+    expect = 'start'
+    eof = False
+    while True:
+        while position < len(buffer) and buffer[position].isspace():
+            position += 1
+        if position < len(buffer):
+            char = buffer[position]
+            if expect == 'start':
+                if char != '[':
+                    raise ValueError("Expected a JSON array.")
+                expect = 'first'
+                position += 1
+                continue
+            if expect == 'end':
+                raise ValueError("Unexpected data after the JSON array.")
+            if expect == 'separator':
+                if char == ']':
+                    expect = 'end'
+                    position += 1
+                    continue
+                if char != ',':
+                    raise ValueError("Expected ',' or ']' after a value in the JSON array.")
+                expect = 'value'
+                position += 1
+                continue
+            if char == ']' and expect == 'first':
+                expect = 'end'
+                position += 1
+                continue
+            if char in ',]':
+                raise ValueError("Expected a value in the JSON array.")
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError as e:
+                if eof or not cut_off(e, buffer):
+                    raise
+            else:
+                if end < len(buffer) - CUT_OFF_CHARS or eof:
+                    yield value
+                    position = end
+                    expect = 'separator'
+                    continue
+        elif eof:
+            if expect == 'end':
+                return
+            raise ValueError("Unexpected end of file inside the JSON array.")
+
+        buffer = buffer[position:]
+        position = 0
+        chunk = handle.read(chunk_size)
+        eof = not chunk
+        buffer += chunk
+
+
+def iter_json_lines(handle):
+    for number, line in enumerate(handle, 1):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"Line {number}: {e}")
+
+
+def iter_records(path):
+    with open(path, encoding='utf-8-sig') as handle:
+        first = ''
+        while not first.strip():
+            first = handle.read(1)
+            if not first:
+                return
+        handle.seek(0)
+        if first == '[' and not path.endswith(('.jsonl', '.ndjson')):
+            yield from iter_json_array(handle)
+        else:
+            yield from iter_json_lines(handle)
@@ -0,0 +1,82 @@
+import os
+import re
+import sqlite3
+import time
+from functools import lru_cache
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+# With PROMETHEUS_MULTIPROC_DIR set (gunicorn.conf.py does this) every worker
+# writes its samples to files in that directory and /metrics sums them, so the
+# numbers cover all workers rather than whichever one served the scrape.
+FAST_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 10.0)
+
+REQUEST_LATENCY = Histogram(
+    'gbv_http_request_duration_seconds', 'Time to serve a request, including streamed bodies.',
+    ['endpoint', 'method']
+)
+REQUESTS = Counter('gbv_http_requests', 'Requests served.', ['endpoint', 'method', 'status'])
+QUERY_LATENCY = Histogram(
+    'gbv_sqlite_statement_duration_seconds', 'Time spent in execute()/executemany() per statement.',
+    ['statement'], buckets=FAST_BUCKETS
+)
+RENDER_LATENCY = Histogram(
+    'gbv_template_render_duration_seconds', 'Time to render a page template.',
+    ['template'], buckets=FAST_BUCKETS
+)
+ERRORS = Counter('gbv_errors', 'Errors caught or raised while serving requests.', ['kind', 'exception'])
+
+TABLE_PATTERN = re.compile(r'\b(?:FROM|INTO|UPDATE|TABLE|INDEX|TRIGGER|VIEW)\s+(?:IF\s+(?:NOT\s+)?EXISTS\s+)?(\w+)', re.IGNORECASE)
+
+
+@lru_cache(maxsize=512)
+def statement_label(sql):
+    words = sql.split(None, 1)
+    if not words:
+        return 'EMPTY'
+    verb = words[0].upper()
+    match = TABLE_PATTERN.search(sql)
+    return f'{verb} {match.group(1)}' if match else verb
+
+
+# The timing covers preparing the statement and stepping to its first row;
+# rows pulled later with fetch*() or iteration are not included.
+class TimedCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            QUERY_LATENCY.labels(statement_label(sql)).observe(time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            QUERY_LATENCY.labels(statement_label(sql)).observe(time.perf_counter() - start)
+
+
+class TimedConnection(sqlite3.Connection):
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def record_error(kind, error):
+    ERRORS.labels(kind, type(error).__name__).inc()
+
+
+def exposition():
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
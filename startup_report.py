@@ -0,0 +1,112 @@
+"""Report how long `import app` takes and which imports dominate it.
+
+Runs the import in a fresh interpreter with `-X importtime`, prints the
+slowest modules and exits non-zero when the import exceeds --budget-ms or
+pulls in a module listed in --forbid, so CI can hold the line on worker
+boot time:
+
+    python startup_report.py --budget-ms 400
+    python startup_report.py --json > startup.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+import app
+elapsed = time.perf_counter() - start
+try:
+    import resource
+    max_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+except ImportError:
+    max_rss_kb = None
+print(json.dumps({
+    "import_ms": elapsed * 1000,
+    "max_rss_kb": max_rss_kb,
+    "modules": sorted(sys.modules),
+}))
+'''
+
+DEFAULT_FORBID = 'pandas,numpy,pyarrow,analytics'
+
+
+def parse_importtime(stderr):
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules.append({
+            'module': name.strip(),
+            'self_ms': int(self_us) / 1000,
+            'cumulative_ms': int(cumulative_us) / 1000,
+            'depth': depth,
+        })
+    return modules
+
+
+def measure(runs):
+    here = os.path.dirname(os.path.abspath(__file__))
+    samples = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', PROBE],
+            cwd=here, capture_output=True, text=True, check=True
+        )
+        report = json.loads(result.stdout.strip().splitlines()[-1])
+        report['imports'] = parse_importtime(result.stderr)
+        samples.append(report)
+    # The fastest run is the least disturbed by the rest of the machine.
+    return min(samples, key=lambda sample: sample['import_ms'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--budget-ms', type=float, default=None, help='fail if `import app` takes longer than this')
+    parser.add_argument('--forbid', default=DEFAULT_FORBID, help='comma-separated modules that must not load at import')
+    parser.add_argument('--runs', type=int, default=3, help='measure this many times and keep the fastest')
+    parser.add_argument('--top', type=int, default=15, help='number of slowest top-level imports to list')
+    parser.add_argument('--json', action='store_true', help='print a machine-readable report')
+    args = parser.parse_args()
+
+    report = measure(args.runs)
+    top_level = sorted(
+        (module for module in report['imports'] if module['depth'] <= 1),
+        key=lambda module: module['cumulative_ms'], reverse=True
+    )[:args.top]
+    forbidden = [name for name in args.forbid.split(',') if name and name in report['modules']]
+
+    failures = []
+    if args.budget_ms is not None and report['import_ms'] > args.budget_ms:
+        failures.append(f"import app took {report['import_ms']:.1f} ms, budget is {args.budget_ms:.1f} ms")
+    if forbidden:
+        failures.append(f"heavy modules loaded at import: {', '.join(forbidden)}")
+
+    if args.json:
+        print(json.dumps({
+            'import_ms': round(report['import_ms'], 1),
+            'max_rss_kb': report['max_rss_kb'],
+            'budget_ms': args.budget_ms,
+            'forbidden_loaded': forbidden,
+            'slowest': top_level,
+            'failures': failures,
+        }, indent=2))
+    else:
+        rss = f"{report['max_rss_kb'] / 1024:.1f} MB" if report['max_rss_kb'] else 'n/a'
+        print(f"import app: {report['import_ms']:.1f} ms, max RSS {rss}")
+        print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+        for module in top_level:
+            print(f"{module['cumulative_ms']:>14.1f} {module['self_ms']:>9.1f}  {module['module']}")
+        for failure in failures:
+            print(f'FAIL: {failure}')
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,83 @@
+import random
+import sqlite3
+from contextlib import closing
+from datetime import datetime, timedelta
+
+import pytest
+
+import analytics
+import app
+
+# Filter combinations the admin view should answer with index seeks.
+FILTERS = [
+    {'from': '2025-01-01', 'to': '2025-01-31'},
+    {'age': '19-25'},
+    {'gender': 'Female'},
+    {'language': 'sw'},
+    {'risk': '1'},
+    {'support': 'yes'},
+    {'support': 'none'},
+    {'age': '13-18', 'gender': 'Female'},
+    {'language': 'en', 'risk': '1'},
+    {'from': '2025-01-01', 'gender': 'Male', 'risk': '1', 'support': 'no'},
+]
+
+SEED_ROWS = 2000
+
+# Records the plan of every statement run while `plans` is a list.
+class QueryPlanConnection(sqlite3.Connection):
+    plans = None
+
+    def execute(self, sql, parameters=()):
+        if self.plans is not None:
+            self.plans.append([row[3] for row in super().execute(f'EXPLAIN QUERY PLAN {sql}', parameters)])
+        return super().execute(sql, parameters)
+
+@pytest.fixture(scope='module')
+def conn(tmp_path_factory):
+    path = tmp_path_factory.mktemp('query_plans') / 'assessments.db'
+    database = app.app.config['DATABASE']
+    app.app.config['DATABASE'] = str(path)
+    try:
+        app.init_db()
+        generator = random.Random(0)
+        start = datetime(2024, 7, 1)
+        rows = []
+        for index in range(SEED_ROWS):
+            row, _ = app.assessment_row(
+                generator.randint(13, 40), generator.choice(app.GENDERS), generator.choice(list(app.QUESTIONS)),
+                [generator.choice(['yes', 'no']) for _ in range(app.QUESTION_COUNT)],
+                str(start + timedelta(minutes=index * 300)),
+            )
+            rows.append(row)
+        with closing(app.connect_db()) as seed:
+            app.write_assessments(seed, rows)
+            seed.execute('UPDATE assessments SET support = id % 3 WHERE id % 3 < 2')
+            seed.commit()
+        with closing(app.connect_db(factory=QueryPlanConnection)) as conn:
+            yield conn
+    finally:
+        app.app.config['DATABASE'] = database
+
+def queries(conn, filters):
+    where, params = app.filter_sql(filters)
+    return {
+        'stats': lambda: app.dashboard_stats(conn, where, params),
+        'questions': lambda: analytics.slice_summary(conn, app.QUESTION_SET_VERSION, app.QUESTION_GROUPS, where, params),
+        'trends': lambda: app.trend_series(conn, where=where, params=params),
+        'page': lambda: app.fetch_assessments_page(conn, None, None, app.ADMIN_PAGE_SIZE, filters),
+        'older page': lambda: app.fetch_assessments_page(conn, 2 ** 62, None, app.ADMIN_PAGE_SIZE, filters),
+        'newer page': lambda: app.fetch_assessments_page(conn, None, 0, app.ADMIN_PAGE_SIZE, filters),
+    }
+
+@pytest.mark.parametrize('filters', FILTERS, ids=lambda filters: ','.join(f'{name}={value}' for name, value in filters.items()))
+def test_filtered_queries_use_indexes(conn, filters):
+    for name, query in queries(conn, filters).items():
+        conn.plans = []
+        query()
+        assert conn.plans, name
+        for plan in conn.plans:
+            assert not any(step.startswith('SCAN assessments') for step in plan), f"{name}: {'; '.join(plan)}"
+            # A page sorted in a temporary b-tree costs as much as the whole slice.
+            if name.endswith('page'):
+                assert not any('TEMP B-TREE' in step for step in plan), f"{name}: {'; '.join(plan)}"